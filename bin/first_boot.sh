@@ -203,7 +203,7 @@ fi
 echo "Generating beep files..."
 if [ -f "$BLACKBOX_DIR/assets/beeps/generate_beeps.py" ]; then
     cd "$BLACKBOX_DIR/assets/beeps"
-    python3 generate_beeps.py
+    PYTHONPATH="$BLACKBOX_DIR" python3 generate_beeps.py
     echo "Beep files generated"
 else
     echo "Beep generator not found, creating simple beep files..."
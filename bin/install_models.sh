@@ -56,12 +56,19 @@ cd whisper.cpp
 # Build with GPU support for Jetson
 make clean
 make -j$(nproc) WHISPER_CUDA=1
+make -j$(nproc) quantize
+# Persistent server the ASR keeps the model loaded in; same CUDA objects as whisper
+make -j$(nproc) WHISPER_CUDA=1 server
 
 # Install Whisper.cpp
 cp whisper "$WHISPER_DIR/"
+cp server "$WHISPER_DIR/whisper-server"
 cp models/ggml-tiny.en.bin "$WHISPER_DIR/whisper-tiny.en.bin"
 cp models/ggml-base.en.bin "$WHISPER_DIR/whisper-base.en.bin"
 
+# Q5_0 quantized tiny.en, preferred by the ASR when present
+./quantize models/ggml-tiny.en.bin "$WHISPER_DIR/whisper-tiny.en-q5_0.bin" q5_0
+
 # Install Piper TTS
 echo "Installing Piper TTS..."
 cd /tmp
@@ -69,7 +76,10 @@ if [ -d "piper" ]; then
     rm -rf piper
 fi
 
-git clone https://github.com/rhasspy/piper.git
+# Pinned: blackbox/audio/piper_process.py detects the end of each raw-mode utterance from
+# the "Real-time factor" line this release logs to stderr
+PIPER_VERSION="2023.11.14-2"  # Piper 1.2.0
+git clone --depth 1 --branch "$PIPER_VERSION" https://github.com/rhasspy/piper.git
 cd piper
 
 # Build Piper
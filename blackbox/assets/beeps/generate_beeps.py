@@ -5,33 +5,127 @@ Creates short WAV files for different feedback types
 """
 
 import numpy as np
-import wave
-import os
+import sys
 from pathlib import Path
+from typing import List, Sequence, Tuple
+
+try:
+    from blackbox.audio.pcm import f32_to_s16, write_wav
+except ImportError:
+    # Run as a script from the source tree: make the blackbox package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+    from blackbox.audio.pcm import f32_to_s16, write_wav
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+FADE_DURATION = 0.01  # 10ms fade
+BEEP_AMPLITUDE = 0.3
+
+# Cody-Waite split of pi/2 for range reduction to [-pi/4, pi/4]
+_TWO_OVER_PI = 0.6366197723675814
+_PIO2_HI = 1.5707963109016418
+_PIO2_LO = 1.5893254712295857e-08
+
+def _fill_beep(out: np.ndarray, frequency: float, sample_rate: int,
+               fade_samples: int, amplitude: float) -> None:
+    """Write a faded sine tone into out in a single fused pass"""
+    n = out.size
+    step = 2.0 * np.pi * frequency / sample_rate
+    fade = max(fade_samples - 1, 1)
+    for i in range(n):
+        x = step * i
+        k = np.floor(x * _TWO_OVER_PI + 0.5)
+        r = (x - k * _PIO2_HI) - k * _PIO2_LO
+        r2 = r * r
+        quadrant = int(k) & 3
+        if quadrant & 1:
+            s = 1.0 + r2 * (-0.5 + r2 * (1.0 / 24.0 + r2 * (-1.0 / 720.0)))
+        else:
+            s = r * (1.0 + r2 * (-1.0 / 6.0 + r2 * (1.0 / 120.0 + r2 * (-1.0 / 5040.0))))
+        if quadrant & 2:
+            s = -s
+        # Fade in/out to avoid clicks
+        gain = min(1.0, i / fade, (n - 1 - i) / fade)
+        out[i] = amplitude * s * gain
+
+if njit is not None:
+    _fill_beep = njit(fastmath=True, cache=True)(_fill_beep)
+
+def generate_beeps(specs: Sequence[Tuple[float, float]], sample_rate: int = 22050) -> List[np.ndarray]:
+    """
+    Generate several beep tones in one pass
+    Args:
+        specs: (frequency, duration) pairs
+        sample_rate: Sample rate shared by all beeps
+    Returns:
+        One float32 view per beep into a single contiguous buffer
+    """
+    lengths = np.array([int(sample_rate * duration) for _, duration in specs], dtype=np.int64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    out = np.empty(int(offsets[-1]), dtype=np.float32)
+    fade_samples = int(FADE_DURATION * sample_rate)
+    
+    if njit is not None:
+        beeps = []
+        for (frequency, _), start, end in zip(specs, offsets[:-1], offsets[1:]):
+            beep = out[start:end]
+            _fill_beep(beep, frequency, sample_rate, fade_samples, BEEP_AMPLITUDE)
+            beeps.append(beep)
+        return beeps
+    
+    # Fill per-beep phase by accumulation, then take sin over the whole buffer at once
+    ramp = np.arange(int(lengths.max()) if len(lengths) else 0, dtype=np.float32)
+    for (frequency, _), start, end in zip(specs, offsets[:-1], offsets[1:]):
+        np.multiply(ramp[:end - start], np.float32(2 * np.pi * frequency / sample_rate), out=out[start:end])
+    np.sin(out, out=out)
+    out *= np.float32(BEEP_AMPLITUDE)
+    
+    # Apply fade in/out to avoid clicks
+    fade_in = np.linspace(0, 1, fade_samples, dtype=np.float32)
+    fade_out = fade_in[::-1]
+    
+    beeps = []
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        beep = out[start:end]
+        beep[:fade_samples] *= fade_in
+        beep[-fade_samples:] *= fade_out
+        beeps.append(beep)
+    
+    return beeps
 
 def generate_beep(frequency: float, duration: float, sample_rate: int = 22050) -> np.ndarray:
     """Generate a beep tone"""
-    t = np.linspace(0, duration, int(sample_rate * duration), False)
-    beep = 0.3 * np.sin(2 * np.pi * frequency * t)
+    return generate_beeps([(frequency, duration)], sample_rate)[0]
+
+def assemble(parts: Sequence) -> np.ndarray:
+    """
+    Lay out tones and silences in one preallocated buffer
+    Args:
+        parts: Arrays to copy in order, or ints for that many samples of silence
+    """
+    sizes = [p if isinstance(p, int) else p.size for p in parts]
+    out = np.empty(sum(sizes), dtype=np.float32)
     
-    # Apply fade in/out to avoid clicks
-    fade_samples = int(0.01 * sample_rate)  # 10ms fade
-    beep[:fade_samples] *= np.linspace(0, 1, fade_samples)
-    beep[-fade_samples:] *= np.linspace(1, 0, fade_samples)
+    i = 0
+    for part, size in zip(parts, sizes):
+        if isinstance(part, int):
+            out[i:i + size].fill(0)
+        else:
+            out[i:i + size] = part
+        i += size
     
-    return beep.astype(np.float32)
+    return out
 
 def save_wav_file(file_path: str, audio_data: np.ndarray, sample_rate: int = 22050):
     """Save audio data to WAV file"""
-    # Convert to int16
-    audio_int16 = (audio_data * 32767).astype(np.int16)
-    
-    # Write WAV file
-    with wave.open(file_path, 'wb') as wav_file:
-        wav_file.setnchannels(1)  # Mono
-        wav_file.setsampwidth(2)  # 16-bit
-        wav_file.setframerate(sample_rate)
-        wav_file.writeframes(audio_int16.tobytes())
+    # Convert to int16 in a single rounded, saturating pass
+    audio_int16 = np.empty(audio_data.size, dtype=np.int16)
+    f32_to_s16(audio_data.reshape(-1), audio_int16)
+    write_wav(file_path, audio_int16, sample_rate)
 
 def main():
     """Generate all beep files"""
@@ -41,40 +135,23 @@ def main():
     
     sample_rate = 22050
     
-    # Recording start beep (1 beep, 800Hz, 0.3s)
-    print("Generating recording start beep...")
-    beep = generate_beep(800, 0.3, sample_rate)
-    save_wav_file(assets_dir / "recording_start.wav", beep, sample_rate)
-    
-    # Recording stop beep (2 beeps, 600Hz, 0.2s each)
-    print("Generating recording stop beep...")
-    beep1 = generate_beep(600, 0.2, sample_rate)
-    beep2 = generate_beep(600, 0.2, sample_rate)
-    silence = np.zeros(int(0.1 * sample_rate), dtype=np.float32)  # 100ms silence
-    beep_sequence = np.concatenate([beep1, silence, beep2])
-    save_wav_file(assets_dir / "recording_stop.wav", beep_sequence, sample_rate)
-    
-    # Success beep (3 beeps, 1000Hz, 0.15s each)
-    print("Generating success beep...")
-    beep1 = generate_beep(1000, 0.15, sample_rate)
-    beep2 = generate_beep(1000, 0.15, sample_rate)
-    beep3 = generate_beep(1000, 0.15, sample_rate)
-    silence = np.zeros(int(0.1 * sample_rate), dtype=np.float32)  # 100ms silence
-    beep_sequence = np.concatenate([beep1, silence, beep2, silence, beep3])
-    save_wav_file(assets_dir / "success.wav", beep_sequence, sample_rate)
+    # (label, file name, frequency, duration, beep count)
+    beep_files = [
+        ("recording start", "recording_start.wav", 800, 0.3, 1),
+        ("recording stop", "recording_stop.wav", 600, 0.2, 2),
+        ("success", "success.wav", 1000, 0.15, 3),
+        ("error", "error.wav", 400, 0.5, 1),
+        ("confirm", "confirm.wav", 700, 0.2, 2),
+    ]
     
-    # Error beep (1 beep, 400Hz, 0.5s)
-    print("Generating error beep...")
-    beep = generate_beep(400, 0.5, sample_rate)
-    save_wav_file(assets_dir / "error.wav", beep, sample_rate)
+    # Every distinct tone is synthesized once, in a single buffer
+    tones = generate_beeps([(freq, dur) for _, _, freq, dur, _ in beep_files], sample_rate)
+    silence_samples = int(0.1 * sample_rate)  # 100ms silence
     
-    # Confirm beep (2 beeps, 700Hz, 0.2s each)
-    print("Generating confirm beep...")
-    beep1 = generate_beep(700, 0.2, sample_rate)
-    beep2 = generate_beep(700, 0.2, sample_rate)
-    silence = np.zeros(int(0.1 * sample_rate), dtype=np.float32)  # 100ms silence
-    beep_sequence = np.concatenate([beep1, silence, beep2])
-    save_wav_file(assets_dir / "confirm.wav", beep_sequence, sample_rate)
+    for (label, file_name, _, _, count), tone in zip(beep_files, tones):
+        print(f"Generating {label} beep...")
+        beep_sequence = assemble([tone, silence_samples] * (count - 1) + [tone])
+        save_wav_file(assets_dir / file_name, beep_sequence, sample_rate)
     
     print("All beep files generated successfully!")
     print(f"Files saved to: {assets_dir}")
@@ -4,15 +4,63 @@ Enforces 16 kHz/16-bit mono capture and 22.05 kHz/16-bit playback
 """
 
 import os
+import math
 import wave
+import ctypes
+import ctypes.util
 import tempfile
 import subprocess
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 import numpy as np
+from scipy import signal
+
+from .pcm import f32_to_s16, write_wav
 
 logger = logging.getLogger(__name__)
 
+# libasound constants (alsa/pcm.h)
+SND_PCM_STREAM_PLAYBACK = 0
+SND_PCM_STREAM_CAPTURE = 1
+SND_PCM_NONBLOCK = 1
+SND_PCM_FORMAT_S16_LE = 2
+SND_PCM_ACCESS_RW_INTERLEAVED = 3
+PCM_LATENCY_US = 100000  # 100ms ring, periods sized by libasound
+
+def _load_libasound() -> Optional[ctypes.CDLL]:
+    """Bind the libasound PCM calls used for direct capture/playback"""
+    try:
+        lib = ctypes.CDLL(ctypes.util.find_library('asound') or 'libasound.so.2')
+    except OSError:
+        logger.warning("libasound not available, using arecord/aplay")
+        return None
+    
+    lib.snd_pcm_open.argtypes = [ctypes.POINTER(ctypes.c_void_p), ctypes.c_char_p, ctypes.c_int, ctypes.c_int]
+    lib.snd_pcm_set_params.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_uint,
+                                       ctypes.c_uint, ctypes.c_int, ctypes.c_uint]
+    lib.snd_pcm_get_params.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_ulong),
+                                       ctypes.POINTER(ctypes.c_ulong)]
+    lib.snd_pcm_readi.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_ulong]
+    lib.snd_pcm_readi.restype = ctypes.c_long
+    lib.snd_pcm_writei.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_ulong]
+    lib.snd_pcm_writei.restype = ctypes.c_long
+    lib.snd_pcm_recover.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int]
+    lib.snd_pcm_prepare.argtypes = [ctypes.c_void_p]
+    lib.snd_pcm_drop.argtypes = [ctypes.c_void_p]
+    lib.snd_pcm_drain.argtypes = [ctypes.c_void_p]
+    lib.snd_pcm_close.argtypes = [ctypes.c_void_p]
+    lib.snd_strerror.argtypes = [ctypes.c_int]
+    lib.snd_strerror.restype = ctypes.c_char_p
+    return lib
+
+_libasound = _load_libasound()
+
+def _check_alsa(ret: int, what: str) -> int:
+    """Raise OSError for a negative libasound return code"""
+    if ret < 0:
+        raise OSError(-ret, f"{what}: {_libasound.snd_strerror(ret).decode()}")
+    return ret
+
 class ALSAIO:
     """ALSA-only audio input/output with device selection by name"""
     
@@ -20,6 +68,17 @@ class ALSAIO:
         self.config_path = config_path
         self.input_device = None
         self.output_device = None
+        self._input_by_name: Dict[str, Dict[str, Any]] = {}
+        self._output_by_name: Dict[str, Dict[str, Any]] = {}
+        
+        self._silence_template = np.zeros(0, dtype=np.int16)
+        self._i16_scratch: Optional[np.ndarray] = None
+        
+        # Fixed scratch WAV path for the aplay fallback, on tmpfs when available
+        tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        tmp_prefix = os.path.join(tmp_dir, f"blackbox-{os.getpid()}-{id(self):x}")
+        self._playback_tmp = f"{tmp_prefix}-play.wav"
+        
         self.load_device_config()
     
     def load_device_config(self) -> None:
@@ -34,16 +93,15 @@ class ALSAIO:
                 input_devices = config.get('input', [])
                 output_devices = config.get('output', [])
                 
-                # Prefer USB devices
+                # Index devices by lowercased name for the setters
                 for device in input_devices:
-                    if 'usb' in device['name'].lower():
-                        self.input_device = device
-                        break
-                
+                    self._input_by_name.setdefault(device['name'].lower(), device)
                 for device in output_devices:
-                    if 'usb' in device['name'].lower():
-                        self.output_device = device
-                        break
+                    self._output_by_name.setdefault(device['name'].lower(), device)
+                
+                # Prefer USB devices
+                self.input_device = self._find_device(self._input_by_name, 'usb')
+                self.output_device = self._find_device(self._output_by_name, 'usb')
                 
                 # Fallback to first available device
                 if not self.input_device and input_devices:
@@ -57,49 +115,39 @@ class ALSAIO:
         except Exception as e:
             logger.error(f"Failed to load audio device config: {e}")
     
+    def _find_device(self, devices_by_name: Dict[str, Dict[str, Any]], device_name: str) -> Optional[Dict[str, Any]]:
+        """Look up a device by exact name, then by substring"""
+        name = device_name.lower()
+        device = devices_by_name.get(name)
+        if device is not None:
+            return device
+        
+        for key, device in devices_by_name.items():
+            if name in key:
+                return device
+        return None
+    
     def set_input_device(self, device_name: str) -> bool:
         """Set input device by name"""
-        try:
-            import json
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r') as f:
-                    config = json.load(f)
-                
-                input_devices = config.get('input', [])
-                for device in input_devices:
-                    if device_name.lower() in device['name'].lower():
-                        self.input_device = device
-                        logger.info(f"Set input device to: {device['name']}")
-                        return True
-            
+        device = self._find_device(self._input_by_name, device_name)
+        if device is None:
             logger.error(f"Input device '{device_name}' not found")
             return False
-            
-        except Exception as e:
-            logger.error(f"Error setting input device: {e}")
-            return False
+        
+        self.input_device = device
+        logger.info(f"Set input device to: {device['name']}")
+        return True
     
     def set_output_device(self, device_name: str) -> bool:
         """Set output device by name"""
-        try:
-            import json
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r') as f:
-                    config = json.load(f)
-                
-                output_devices = config.get('output', [])
-                for device in output_devices:
-                    if device_name.lower() in device['name'].lower():
-                        self.output_device = device
-                        logger.info(f"Set output device to: {device['name']}")
-                        return True
-            
+        device = self._find_device(self._output_by_name, device_name)
+        if device is None:
             logger.error(f"Output device '{device_name}' not found")
             return False
-            
-        except Exception as e:
-            logger.error(f"Error setting output device: {e}")
-            return False
+        
+        self.output_device = device
+        logger.info(f"Set output device to: {device['name']}")
+        return True
     
     def record_audio(self, duration_seconds: float, sample_rate: int = 16000) -> Optional[np.ndarray]:
         """
@@ -110,15 +158,44 @@ class ALSAIO:
         Returns:
             Audio data as numpy array or None if failed
         """
+        audio_int16 = self.record_audio_raw(duration_seconds, sample_rate)
+        if audio_int16 is None:
+            return None
+        
+        return self._int16_to_float(audio_int16)
+    
+    def record_audio_raw(self, duration_seconds: float, sample_rate: int = 16000,
+                         out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Record audio as raw int16 PCM, for consumers that write it straight back out
+        Args:
+            duration_seconds: Duration to record
+            sample_rate: Sample rate (default 16000 Hz)
+            out: Optional int16 buffer to capture into; its length sets the frame count
+        Returns:
+            int16 samples (out itself, or a prefix of it if capture ended early) or None if failed
+        """
         if not self.input_device:
             logger.error("No input device configured")
             return None
         
+        if _libasound is not None:
+            try:
+                return self._record_pcm(duration_seconds, sample_rate, out)
+            except OSError as e:
+                logger.warning(f"Direct ALSA capture failed, falling back to arecord: {e}")
+        
+        audio_int16 = self._record_with_arecord(duration_seconds, sample_rate)
+        if audio_int16 is None or out is None:
+            return audio_int16
+        
+        n = min(len(audio_int16), out.size)
+        out[:n] = audio_int16[:n]
+        return out if n == out.size else out[:n]
+    
+    def _record_with_arecord(self, duration_seconds: float, sample_rate: int) -> Optional[np.ndarray]:
+        """Record through an arecord subprocess, reading raw PCM from its stdout"""
         try:
-            # Create temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
-            
             # Record using arecord
             cmd = [
                 'arecord',
@@ -126,12 +203,12 @@ class ALSAIO:
                 '-f', 'S16_LE',  # 16-bit signed little-endian
                 '-r', str(sample_rate),
                 '-c', '1',  # Mono
+                '-t', 'raw',
                 '-d', str(int(duration_seconds))
             ]
             
-            # Record to temporary file
             result = subprocess.run(
-                cmd + [temp_path],
+                cmd,
                 capture_output=True,
                 timeout=duration_seconds + 5
             )
@@ -140,13 +217,7 @@ class ALSAIO:
                 logger.error(f"arecord failed: {result.stderr.decode()}")
                 return None
             
-            # Read WAV file
-            audio_data = self._read_wav_file(temp_path, sample_rate)
-            
-            # Clean up
-            os.unlink(temp_path)
-            
-            return audio_data
+            return np.frombuffer(result.stdout, dtype=np.int16)
             
         except subprocess.TimeoutExpired:
             logger.error("Audio recording timeout")
@@ -168,10 +239,19 @@ class ALSAIO:
             logger.error("No output device configured")
             return False
         
+        if _libasound is not None:
+            try:
+                self._play_pcm(audio_data, sample_rate)
+                return True
+            except OSError as e:
+                logger.warning(f"Direct ALSA playback failed, falling back to aplay: {e}")
+        
+        return self._play_with_aplay(audio_data, sample_rate)
+    
+    def _play_with_aplay(self, audio_data: np.ndarray, sample_rate: int) -> bool:
+        """Play through an aplay subprocess and the instance's scratch WAV file"""
         try:
-            # Create temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
+            temp_path = self._playback_tmp
             
             # Write WAV file
             self._write_wav_file(temp_path, audio_data, sample_rate)
@@ -191,9 +271,6 @@ class ALSAIO:
                 timeout=30
             )
             
-            # Clean up
-            os.unlink(temp_path)
-            
             if result.returncode != 0:
                 logger.error(f"aplay failed: {result.stderr.decode()}")
                 return False
@@ -207,45 +284,148 @@ class ALSAIO:
             logger.error(f"Error playing audio: {e}")
             return False
     
+    def _open_pcm(self, stream: int, hw_id: str, sample_rate: int, channels: int) -> Tuple[ctypes.c_void_p, int]:
+        """
+        Open and configure a PCM handle, returning it with its period size
+        The caller closes it once done: hw: devices take a single opener, so a
+        handle left open would make every other user of the device fail with EBUSY
+        """
+        handle = ctypes.c_void_p()
+        _check_alsa(_libasound.snd_pcm_open(ctypes.byref(handle), hw_id.encode(), stream, 0),
+                    f"snd_pcm_open({hw_id})")
+        try:
+            _check_alsa(_libasound.snd_pcm_set_params(handle, SND_PCM_FORMAT_S16_LE,
+                                                      SND_PCM_ACCESS_RW_INTERLEAVED, channels,
+                                                      sample_rate, 1, PCM_LATENCY_US),
+                        "snd_pcm_set_params")
+            buffer_size = ctypes.c_ulong()
+            period_size = ctypes.c_ulong()
+            _check_alsa(_libasound.snd_pcm_get_params(handle, ctypes.byref(buffer_size),
+                                                      ctypes.byref(period_size)),
+                        "snd_pcm_get_params")
+        except OSError:
+            _libasound.snd_pcm_close(handle)
+            raise
+        
+        return handle, period_size.value
+    
+    def close(self) -> None:
+        """Remove the playback scratch file"""
+        try:
+            os.unlink(self._playback_tmp)
+        except FileNotFoundError:
+            pass
+    
+    def _record_pcm(self, duration_seconds: float, sample_rate: int,
+                    out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Capture straight into an int16 buffer with snd_pcm_readi"""
+        if out is not None:
+            buf = out
+        else:
+            buf = np.empty(int(duration_seconds * sample_rate), dtype=np.int16)
+        frames = buf.size
+        ptr = buf.ctypes.data
+        
+        handle, _ = self._open_pcm(SND_PCM_STREAM_CAPTURE, self.input_device['hw_id'], sample_rate, 1)
+        try:
+            _check_alsa(_libasound.snd_pcm_prepare(handle), "snd_pcm_prepare")
+            done = 0
+            while done < frames:
+                n = _libasound.snd_pcm_readi(handle, ptr + done * 2, frames - done)
+                if n < 0:
+                    # Recover from overruns and keep reading
+                    _check_alsa(_libasound.snd_pcm_recover(handle, n, 1), "snd_pcm_readi")
+                    continue
+                done += n
+            _libasound.snd_pcm_drop(handle)
+        finally:
+            _libasound.snd_pcm_close(handle)
+        
+        return buf
+    
+    def _play_pcm(self, audio_data: np.ndarray, sample_rate: int) -> None:
+        """Write int16 frames with snd_pcm_writei, padding the tail to a whole period"""
+        channels = audio_data.shape[1] if audio_data.ndim > 1 else 1
+        audio_int16 = self._to_int16(audio_data)
+        
+        handle, period = self._open_pcm(SND_PCM_STREAM_PLAYBACK, self.output_device['hw_id'],
+                                        sample_rate, channels)
+        try:
+            _check_alsa(_libasound.snd_pcm_prepare(handle), "snd_pcm_prepare")
+            self._write_frames(handle, audio_int16, len(audio_int16), channels)
+            
+            tail = -len(audio_int16) % period if period else 0
+            if tail:
+                if self._silence_template.size < period * channels:
+                    self._silence_template = np.zeros(period * channels, dtype=np.int16)
+                self._write_frames(handle, self._silence_template, tail, channels)
+            
+            _libasound.snd_pcm_drain(handle)
+        finally:
+            _libasound.snd_pcm_close(handle)
+    
+    def _write_frames(self, handle: ctypes.c_void_p, frames_buf: np.ndarray, frames: int, channels: int) -> None:
+        """Write frames to a playback handle, recovering from underruns"""
+        ptr = frames_buf.ctypes.data
+        frame_bytes = 2 * channels
+        done = 0
+        while done < frames:
+            n = _libasound.snd_pcm_writei(handle, ptr + done * frame_bytes, frames - done)
+            if n < 0:
+                _check_alsa(_libasound.snd_pcm_recover(handle, n, 1), "snd_pcm_writei")
+                continue
+            done += n
+    
+    def _read_wav_file_raw(self, file_path: str) -> Tuple[np.ndarray, int]:
+        """Read WAV samples without conversion, returning (samples, sample_rate)"""
+        with wave.open(file_path, 'rb') as wav_file:
+            # Get WAV parameters
+            sample_rate = wav_file.getframerate()
+            channels = wav_file.getnchannels()
+            sample_width = wav_file.getsampwidth()
+            frames = wav_file.getnframes()
+            
+            # Read audio data
+            raw_data = wav_file.readframes(frames)
+        
+        # Convert to numpy array
+        if sample_width == 2:
+            audio_data = np.frombuffer(raw_data, dtype=np.int16)
+        elif sample_width == 4:
+            audio_data = np.frombuffer(raw_data, dtype=np.int32)
+        else:
+            raise ValueError(f"Unsupported sample width: {sample_width}")
+        
+        # Reshape for multi-channel
+        if channels > 1:
+            audio_data = audio_data.reshape(-1, channels)
+        
+        return audio_data, sample_rate
+    
     def _read_wav_file(self, file_path: str, target_sample_rate: int) -> Optional[np.ndarray]:
         """Read WAV file and convert to target sample rate"""
         try:
-            with wave.open(file_path, 'rb') as wav_file:
-                # Get WAV parameters
-                sample_rate = wav_file.getframerate()
-                channels = wav_file.getnchannels()
-                sample_width = wav_file.getsampwidth()
-                frames = wav_file.getnframes()
-                
-                # Read audio data
-                raw_data = wav_file.readframes(frames)
-                
-                # Convert to numpy array
-                if sample_width == 2:
-                    audio_data = np.frombuffer(raw_data, dtype=np.int16)
-                elif sample_width == 4:
-                    audio_data = np.frombuffer(raw_data, dtype=np.int32)
-                else:
-                    logger.error(f"Unsupported sample width: {sample_width}")
-                    return None
-                
-                # Convert to float32 and normalize
-                audio_data = audio_data.astype(np.float32) / 32767.0
-                
-                # Reshape for multi-channel
-                if channels > 1:
-                    audio_data = audio_data.reshape(-1, channels)
-                
-                # Resample if needed
-                if sample_rate != target_sample_rate:
-                    audio_data = self._resample_audio(audio_data, sample_rate, target_sample_rate)
-                
-                return audio_data
+            audio_data, sample_rate = self._read_wav_file_raw(file_path)
+            audio_data = self._int16_to_float(audio_data)
+            
+            # Resample if needed
+            if sample_rate != target_sample_rate:
+                audio_data = self._resample_audio(audio_data, sample_rate, target_sample_rate)
+            
+            return audio_data
                 
         except Exception as e:
             logger.error(f"Error reading WAV file: {e}")
             return None
     
+    @staticmethod
+    def _int16_to_float(audio_data: np.ndarray) -> np.ndarray:
+        """Normalize integer PCM to float32 in one fused multiply"""
+        scale = np.float32(1.0 / (1 << (8 * audio_data.itemsize - 1)))
+        audio = np.empty(audio_data.shape, dtype=np.float32)
+        np.multiply(audio_data, scale, out=audio)
+        return audio
+    
     def _write_wav_file(self, file_path: str, audio_data: np.ndarray, sample_rate: int) -> None:
         """Write numpy array to WAV file"""
         try:
@@ -255,33 +435,33 @@ class ALSAIO:
             else:
                 channels = audio_data.shape[1]
             
-            # Convert to int16
-            audio_int16 = (audio_data * 32767).astype(np.int16)
-            
-            # Write WAV file
-            with wave.open(file_path, 'wb') as wav_file:
-                wav_file.setnchannels(channels)
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(sample_rate)
-                wav_file.writeframes(audio_int16.tobytes())
+            # Convert to int16 in a single pass
+            audio_int16 = self._to_int16(audio_data)
+            write_wav(file_path, audio_int16, sample_rate, channels)
                 
         except Exception as e:
             logger.error(f"Error writing WAV file: {e}")
             raise
     
+    def _to_int16(self, audio_data: np.ndarray) -> np.ndarray:
+        """Convert float audio to saturated int16 in the reusable scratch buffer"""
+        n = audio_data.size
+        if self._i16_scratch is None or self._i16_scratch.size < n:
+            self._i16_scratch = np.empty(n * 2, dtype=np.int16)
+        
+        audio_int16 = self._i16_scratch[:n]
+        f32_to_s16(audio_data.reshape(-1), audio_int16)
+        return audio_int16.reshape(audio_data.shape)
+    
     def _resample_audio(self, audio_data: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
-        """Simple resampling using linear interpolation"""
+        """Polyphase FIR resampling with an anti-aliasing filter"""
         if orig_sr == target_sr:
             return audio_data
         
-        ratio = target_sr / orig_sr
-        new_length = int(len(audio_data) * ratio)
-        
-        # Linear interpolation
-        old_indices = np.linspace(0, len(audio_data) - 1, new_length)
-        resampled = np.interp(old_indices, np.arange(len(audio_data)), audio_data)
+        g = math.gcd(orig_sr, target_sr)
+        up, down = target_sr // g, orig_sr // g
         
-        return resampled.astype(np.float32)
+        return signal.resample_poly(audio_data, up, down, axis=0).astype(np.float32, copy=False)
     
     def test_audio_system(self) -> Dict[str, bool]:
         """Test audio input and output"""
@@ -306,8 +486,12 @@ class ALSAIO:
             # Generate a test tone
             sample_rate = 22050
             duration = 1.0
-            t = np.linspace(0, duration, int(sample_rate * duration))
-            test_tone = 0.3 * np.sin(2 * np.pi * 440 * t)  # 440 Hz tone
+            # 440 Hz tone built in float32 by phase accumulation
+            n = int(sample_rate * duration)
+            test_tone = np.arange(n, dtype=np.float32)
+            test_tone *= np.float32(2 * math.pi * 440 / sample_rate)
+            np.sin(test_tone, out=test_tone)
+            test_tone *= np.float32(0.3)
             
             if self.play_audio(test_tone, sample_rate):
                 results['output'] = True
@@ -4,18 +4,58 @@ Optimized for NVIDIA Jetson Orin Nano with GPU acceleration
 """
 
 import os
+import re
 import subprocess
-import tempfile
-import threading
 import time
-import wave
 import numpy as np
+import requests
 import sounddevice as sd
 from typing import List, Optional, Tuple, Dict
 import logging
 
+from .pcm import encode_wav
+from .whisper_server import WhisperServer
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    import pyfftw
+    pyfftw.interfaces.cache.enable()
+    _fft = pyfftw.interfaces.numpy_fft
+    _FFT_KWARGS = {'threads': os.cpu_count() or 1}
+except ImportError:
+    _fft = np.fft
+    _FFT_KWARGS = {}
+
 logger = logging.getLogger(__name__)
 
+# One whisper.cpp output line: the text before the first bracket, and the score if
+# that bracket is "[confidence: 0.xx]"; tags such as "[BLANK_AUDIO]" leave no text
+_LINE_RE = re.compile(rb'^\s*([^\[]*?)\s*(?:\[(?:confidence:\s*([^\]]*?)|[^\]]*)\].*)?$')
+
+# Spectral subtraction STFT: 32ms frames, 50% overlap, noise from the first ~128ms
+STFT_FRAME = 512
+STFT_HOP = STFT_FRAME // 2
+NOISE_FRAMES = 8
+# sqrt of a periodic Hann, used for analysis and synthesis so overlap-add sums to one
+_STFT_WINDOW = np.sqrt(0.5 - 0.5 * np.cos(2 * np.pi * np.arange(STFT_FRAME) / STFT_FRAME)).astype(np.float32)
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _mean_square(x: np.ndarray) -> float:
+        """Mean of squared samples in one fused pass"""
+        s = 0.0
+        for v in x:
+            s += v * v
+        return s / x.size
+else:
+    def _mean_square(x: np.ndarray) -> float:
+        """Mean of squared samples without a squared temporary"""
+        return float(np.dot(x, x)) / x.size
+
 class WhisperASR:
     """GPU-optimized Whisper.cpp ASR with VAD and N-best output"""
     
@@ -24,43 +64,72 @@ class WhisperASR:
         self.sample_rate = 16000
         self.vad_window_ms = 700
         self.vad_threshold = 0.5
+        self._vad_threshold_sq = self.vad_threshold ** 2
         self.temperature = 0.0
         self.temperature_fallback = 0.2
         self.n_best = 3
+        self._gpu_available: Optional[bool] = None
         
         # Audio recording state
         self.is_recording = False
-        self.audio_buffer = []
-        self.recording_thread = None
+        self.max_record_seconds = 60
+        self._ring = np.empty(self.sample_rate * self.max_record_seconds, dtype=np.float32)
+        self._ring_pos = 0
+        self._stream: Optional[sd.InputStream] = None
         
         # Verify model exists
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Whisper model not found at {model_path}")
+        
+        # Persistent whisper.cpp server (model stays loaded between utterances),
+        # launched by the first transcribe so construction never waits on the model load
+        self._server = WhisperServer(
+            "whisper-cpp/whisper-server", model_path,
+            extra_args=[] if self._check_gpu_available() else ["--no-gpu"]
+        )
+        self._open_stream()
+    
+    def close(self) -> None:
+        """Stop the whisper-server process and close the input stream"""
+        self.is_recording = False
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception as e:
+                logger.warning(f"Error closing input stream: {e}")
+            self._stream = None
+        
+        self._server.close()
+    
+    def _open_stream(self) -> bool:
+        """Open and start the input stream once; it stays open for the life of the object"""
+        if self._stream is not None:
+            return True
+        try:
+            self._stream = sd.InputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype=np.float32,
+                blocksize=int(self.sample_rate * self.vad_window_ms / 1000),
+                callback=self._audio_callback
+            )
+            self._stream.start()
+            return True
+        except Exception as e:
+            logger.error(f"Recording error: {e}")
+            self._stream = None
+            return False
     
     def start_recording(self) -> None:
         """Start continuous audio recording with VAD"""
         if self.is_recording:
             return
-            
-        self.is_recording = True
-        self.audio_buffer = []
         
-        def record_audio():
-            try:
-                with sd.InputStream(
-                    samplerate=self.sample_rate,
-                    channels=1,
-                    dtype=np.float32,
-                    blocksize=int(self.sample_rate * self.vad_window_ms / 1000),
-                    callback=self._audio_callback
-                ):
-                    while self.is_recording:
-                        time.sleep(0.1)
-            except Exception as e:
-                logger.error(f"Recording error: {e}")
+        if not self._open_stream():
+            return
         
-        self.recording_thread = threading.Thread(target=record_audio, daemon=True)
-        self.recording_thread.start()
+        self._ring_pos = 0
+        self.is_recording = True
         logger.info("Started audio recording")
     
     def stop_recording(self) -> np.ndarray:
@@ -69,24 +138,29 @@ class WhisperASR:
             return np.array([])
             
         self.is_recording = False
-        if self.recording_thread:
-            self.recording_thread.join(timeout=2.0)
         
-        audio_data = np.concatenate(self.audio_buffer) if self.audio_buffer else np.array([])
-        self.audio_buffer = []
+        audio_data = self._ring[:self._ring_pos].copy()
+        self._ring_pos = 0
         
         logger.info(f"Stopped recording, captured {len(audio_data)} samples")
         return audio_data
     
     def _audio_callback(self, indata, frames, time, status):
         """Callback for audio input with VAD"""
+        if not self.is_recording:
+            return
+        
         if status:
             logger.warning(f"Audio callback status: {status}")
         
-        # Simple VAD based on RMS energy
-        rms = np.sqrt(np.mean(indata**2))
-        if rms > self.vad_threshold:
-            self.audio_buffer.append(indata.copy())
+        # Simple VAD based on RMS energy, compared squared to skip the sqrt
+        block = indata[:, 0]
+        if _mean_square(block) > self._vad_threshold_sq:
+            # Copy into the preallocated buffer, dropping audio past max_record_seconds
+            start = self._ring_pos
+            end = min(start + block.size, self._ring.size)
+            self._ring[start:end] = block[:end - start]
+            self._ring_pos = end
     
     def transcribe(self, audio_data: np.ndarray) -> List[Dict[str, float]]:
         """
@@ -96,25 +170,22 @@ class WhisperASR:
         if len(audio_data) == 0:
             return []
         
-        # Save audio to temporary WAV file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            temp_path = temp_file.name
-            
-            # Convert to 16-bit PCM
-            audio_int16 = (audio_data * 32767).astype(np.int16)
-            
-            with wave.open(temp_path, 'wb') as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(audio_int16.tobytes())
+        # Encode an in-memory WAV and pipe it to whisper.cpp's stdin
+        wav_bytes = self._encode_wav(audio_data)
+        
+        server_url = self._server.start()
+        if server_url:
+            try:
+                return self._transcribe_with_server(server_url, wav_bytes)
+            except (requests.RequestException, ValueError) as e:
+                logger.error(f"whisper-server request failed, using CLI: {e}")
         
         try:
             # Run Whisper.cpp with GPU acceleration
             cmd = [
                 "whisper-cpp/whisper",
                 "-m", self.model_path,
-                "-f", temp_path,
+                "-f", "-",
                 "-t", str(self.temperature),
                 "-n", str(self.n_best),
                 "--no-timestamps",
@@ -127,14 +198,14 @@ class WhisperASR:
             
             result = subprocess.run(
                 cmd,
+                input=wav_bytes,
                 capture_output=True,
-                text=True,
                 timeout=10.0
             )
             
             if result.returncode != 0:
-                logger.error(f"Whisper.cpp failed: {result.stderr}")
-                return self._fallback_transcription(temp_path)
+                logger.error(f"Whisper.cpp failed: {result.stderr.decode(errors='replace')}")
+                return self._fallback_transcription(wav_bytes)
             
             # Parse N-best results
             transcriptions = self._parse_whisper_output(result.stdout)
@@ -142,7 +213,7 @@ class WhisperASR:
             # If no good results, try with higher temperature
             if not transcriptions or max(t.get('confidence', 0) for t in transcriptions) < 0.7:
                 logger.info("Trying fallback transcription with higher temperature")
-                return self._fallback_transcription(temp_path)
+                return self._fallback_transcription(wav_bytes)
             
             return transcriptions
             
@@ -152,32 +223,53 @@ class WhisperASR:
         except Exception as e:
             logger.error(f"Transcription error: {e}")
             return []
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
+    
+    def _transcribe_with_server(self, server_url: str, wav_bytes: bytes) -> List[Dict[str, float]]:
+        """Transcribe through the persistent whisper-server"""
+        response = requests.post(
+            f"{server_url}/inference",
+            files={'file': ('audio.wav', wav_bytes, 'audio/wav')},
+            data={
+                'temperature': str(self.temperature),
+                'temperature_inc': str(self.temperature_fallback),
+                'response_format': 'verbose_json'
+            },
+            timeout=10.0
+        )
+        response.raise_for_status()
+        result = response.json()
+        
+        text = result.get('text', '').strip()
+        if not text:
+            return []
+        
+        # Server does its own temperature fallback; derive confidence from segment log-probs
+        logprobs = [seg['avg_logprob'] for seg in result.get('segments', []) if 'avg_logprob' in seg]
+        confidence = float(np.exp(np.mean(logprobs))) if logprobs else 0.5
+        return [{'text': text, 'confidence': confidence}]
+    
+    def _encode_wav(self, audio_data: np.ndarray) -> bytearray:
+        """Encode mono float audio as an in-memory 16-bit PCM WAV"""
+        # Rounded and saturated, so clipped input stays at full scale instead of wrapping
+        return encode_wav(audio_data, self.sample_rate)
     
     def _check_gpu_available(self) -> bool:
-        """Check if GPU acceleration is available"""
-        try:
-            result = subprocess.run(
-                ["nvidia-smi"],
-                capture_output=True,
-                timeout=2.0
-            )
-            return result.returncode == 0
-        except:
-            return False
+        """Check if GPU acceleration is available (probed once per instance)"""
+        if self._gpu_available is None:
+            self._gpu_available = self._probe_gpu()
+        return self._gpu_available
+    
+    def _probe_gpu(self) -> bool:
+        """Detect an NVIDIA GPU from the driver's device nodes, without forking nvidia-smi"""
+        return os.path.isdir('/proc/driver/nvidia/gpus') or os.path.exists('/dev/nvidia0')
     
-    def _fallback_transcription(self, audio_path: str) -> List[Dict[str, float]]:
+    def _fallback_transcription(self, wav_bytes: bytes) -> List[Dict[str, float]]:
         """Fallback transcription with higher temperature"""
         try:
             cmd = [
                 "whisper-cpp/whisper",
                 "-m", self.model_path,
-                "-f", audio_path,
+                "-f", "-",
                 "-t", str(self.temperature_fallback),
                 "-n", "1",
                 "--no-timestamps",
@@ -189,8 +281,8 @@ class WhisperASR:
             
             result = subprocess.run(
                 cmd,
+                input=wav_bytes,
                 capture_output=True,
-                text=True,
                 timeout=8.0
             )
             
@@ -202,36 +294,26 @@ class WhisperASR:
         
         return []
     
-    def _parse_whisper_output(self, output: str) -> List[Dict[str, float]]:
-        """Parse Whisper.cpp output to extract transcriptions and confidence"""
+    def _parse_whisper_output(self, output: bytes) -> List[Dict[str, float]]:
+        """Parse raw Whisper.cpp stdout, decoding only the matched text"""
         transcriptions = []
-        lines = output.strip().split('\n')
-        
-        for line in lines:
-            if line.strip():
-                # Extract text and confidence from Whisper output
-                # Format: "text [confidence: 0.xx]"
-                if '[' in line and ']' in line:
-                    text = line.split('[')[0].strip()
-                    conf_part = line.split('[')[1].split(']')[0]
-                    if 'confidence:' in conf_part:
-                        try:
-                            confidence = float(conf_part.split('confidence:')[1].strip())
-                            transcriptions.append({
-                                'text': text,
-                                'confidence': confidence
-                            })
-                        except ValueError:
-                            transcriptions.append({
-                                'text': text,
-                                'confidence': 0.5
-                            })
-                else:
-                    # No confidence score, assume medium confidence
-                    transcriptions.append({
-                        'text': line.strip(),
-                        'confidence': 0.5
-                    })
+        
+        # Format: "text [confidence: 0.xx]"; lines without a score get medium confidence
+        for line in output.splitlines():
+            # An unterminated bracket does not match; keep the line as plain text
+            m = _LINE_RE.match(line)
+            text, conf = m.groups() if m else (line.strip(), None)
+            # Skip blank lines and bracket-only segments
+            if not text:
+                continue
+            try:
+                confidence = float(conf) if conf else 0.5
+            except ValueError:
+                confidence = 0.5
+            transcriptions.append({
+                'text': text.decode('utf-8', 'replace'),
+                'confidence': confidence
+            })
         
         return transcriptions
     
@@ -281,24 +363,37 @@ class AudioProcessor:
     
     @staticmethod
     def _spectral_subtraction(audio: np.ndarray, sample_rate: int) -> np.ndarray:
-        """Simple spectral subtraction for noise reduction"""
-        # Apply FFT
-        fft = np.fft.fft(audio)
-        magnitude = np.abs(fft)
-        phase = np.angle(fft)
+        """Overlap-add STFT spectral subtraction for noise reduction"""
+        n = len(audio)
+        if n == 0:
+            return audio.astype(np.float32, copy=False)
+        
+        # Pad by one hop on each side so every sample is covered by two frames
+        hop = STFT_HOP
+        n_frames = -(-n // hop) + 1
+        padded = np.zeros((n_frames + 1) * hop, dtype=np.float32)
+        padded[hop:hop + n] = audio
+        
+        frames = np.lib.stride_tricks.sliding_window_view(padded, STFT_FRAME)[::hop] * _STFT_WINDOW
+        spec = _fft.rfft(frames, axis=1, **_FFT_KWARGS)
+        magnitude = np.abs(spec)
         
-        # Estimate noise floor (first 10% of signal)
-        noise_floor = np.mean(magnitude[:len(magnitude)//10])
+        # Estimate per-bin noise floor from the leading frames
+        noise_floor = magnitude[:NOISE_FRAMES].mean(axis=0)
         
-        # Apply spectral subtraction
-        enhanced_magnitude = magnitude - 0.3 * noise_floor
-        enhanced_magnitude = np.maximum(enhanced_magnitude, 0.1 * magnitude)
+        # Apply spectral subtraction as a real gain on the original spectrum
+        gain = magnitude - 0.3 * noise_floor
+        np.maximum(gain, 0.1 * magnitude, out=gain)
+        np.divide(gain, magnitude, out=gain, where=magnitude > 0)
+        spec *= gain
         
         # Reconstruct signal
-        enhanced_fft = enhanced_magnitude * np.exp(1j * phase)
-        enhanced_audio = np.real(np.fft.ifft(enhanced_fft))
+        frames = _fft.irfft(spec, n=STFT_FRAME, axis=1, **_FFT_KWARGS) * _STFT_WINDOW
+        blocks = np.zeros_like(padded).reshape(-1, hop)
+        blocks[:-1] += frames[:, :hop]
+        blocks[1:] += frames[:, hop:]
         
-        return enhanced_audio.astype(np.float32)
+        return blocks.reshape(-1)[hop:hop + n].astype(np.float32, copy=False)
     
     @staticmethod
     def _normalize_volume(audio: np.ndarray) -> np.ndarray:
@@ -314,30 +409,32 @@ class AudioProcessor:
                             silence_threshold: float = 0.01,
                             max_silence_duration: float = 0.5) -> np.ndarray:
         """Remove long silences that might confuse ASR"""
-        # Find silence regions
-        silence_samples = int(max_silence_duration * sample_rate)
-        window_size = int(0.1 * sample_rate)  # 100ms windows
+        if len(audio) == 0:
+            return np.array([], dtype=np.float32)
         
-        result = []
-        i = 0
+        # RMS of every 100ms window at once (last window may be partial)
+        window_size = int(0.1 * sample_rate)
+        n_full = len(audio) // window_size
+        full = audio[:n_full * window_size].reshape(n_full, window_size)
+        energy = np.einsum('ij,ij->i', full, full)
+        starts = np.arange(0, len(audio), window_size)
+        lengths = np.diff(np.append(starts, len(audio)))
+        if len(lengths) > n_full:
+            tail = audio[n_full * window_size:]
+            energy = np.append(energy, np.dot(tail, tail))
+        rms = np.sqrt(energy / lengths)
         
-        while i < len(audio):
-            window = audio[i:i+window_size]
-            rms = np.sqrt(np.mean(window**2))
-            
-            if rms > silence_threshold:
-                result.extend(window)
-                i += window_size
-            else:
-                # Check if this is a long silence
-                silence_start = i
-                while i < len(audio) and np.sqrt(np.mean(audio[i:i+window_size]**2)) <= silence_threshold:
-                    i += window_size
-                
-                silence_duration = (i - silence_start) / sample_rate
-                if silence_duration < max_silence_duration:
-                    # Keep short silences
-                    result.extend(audio[silence_start:i])
-                # Skip long silences
-        
-        return np.array(result, dtype=np.float32)
+        # Find runs of silent windows
+        silent = (rms <= silence_threshold).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], silent, [0])))
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        
+        # Drop only the silences that are too long, keep short pauses
+        long_runs = (run_ends - run_starts) * window_size / sample_rate >= max_silence_duration
+        marks = np.zeros(len(lengths) + 1, dtype=np.int8)
+        marks[run_starts[long_runs]] = 1
+        marks[run_ends[long_runs]] = -1
+        keep = np.cumsum(marks[:-1]) == 0
+        
+        return audio[np.repeat(keep, lengths)].astype(np.float32, copy=False)
@@ -1,30 +1,81 @@
 """
 Robust Whisper.cpp wrapper with proper flags and error handling
-Records PCM to temp WAV, runs whisper.cpp with optimized flags
+Pipes PCM as an in-memory WAV to whisper.cpp with optimized flags
 Returns N-best transcripts + confidences with retry logic
 """
 
 import os
-import tempfile
+import re
+import functools
+import queue
 import subprocess
 import threading
 import time
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Any
 import numpy as np
-import wave
+import requests
+
+from .pcm import alloc_wav, encode_wav
+from .whisper_server import WhisperServer
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=None)
+def _physical_cores() -> int:
+    """Count physical cores available to this process; SMT siblings share SIMD ports"""
+    cpus = os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else range(os.cpu_count() or 4)
+    cores = set()
+    for cpu in cpus:
+        topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(f"{topology}/physical_package_id") as f:
+                package = f.read().strip()
+            with open(f"{topology}/core_id") as f:
+                core = f.read().strip()
+        except OSError:
+            return os.cpu_count() or 4
+        cores.add((package, core))
+    return len(cores) or os.cpu_count() or 4
+
 class WhisperCppASR:
     """Robust Whisper.cpp ASR wrapper"""
     
-    def __init__(self, model_path: str = "/mnt/nvme/blackbox/models/whisper/whisper-tiny.en.bin"):
+    # Text before the first bracket, and the score if that bracket holds "confidence: x"
+    _CONF_RE = re.compile(rb'^([^\[]*?)\s*(?:\[(?:confidence:\s*([^\]]*?)|[^\]]*)\].*)?$')
+    
+    # Models small enough that beam search costs more than it gains on CPU
+    _SMALL_MODELS = ('tiny', 'base')
+    
+    # Default models, most preferred first: Q5_0 quantized (integer GGML kernels), then F16
+    DEFAULT_MODEL_PATHS = (
+        "/mnt/nvme/blackbox/models/whisper/whisper-tiny.en-q5_0.bin",
+        "/mnt/nvme/blackbox/models/whisper/whisper-tiny.en.bin"
+    )
+    
+    def __init__(self, model_path: Optional[str] = None,
+                 best_of: Optional[int] = None, beam_size: Optional[int] = None):
+        if model_path is None:
+            model_path = next((p for p in self.DEFAULT_MODEL_PATHS if os.path.exists(p)),
+                              self.DEFAULT_MODEL_PATHS[-1])
         self.model_path = model_path
+        # None picks by device and model size, see _decode_params
+        self.best_of = best_of
+        self.beam_size = beam_size
         self.whisper_binary = "/mnt/nvme/blackbox/models/whisper/whisper"
         self.sample_rate = 16000
         self.max_segment_duration = 8.0  # 8 seconds max
         self.min_segment_duration = 1.0  # 1 second min
+        self.energy_threshold = 1e-5  # mean square of [-1, 1] samples, ~-50 dBFS
+        
+        # Decode at temperature 0 and let whisper.cpp fall back in steps within one run
+        self.temperature = 0.0
+        self.temperature_inc = 0.2
+        self.entropy_thold = 2.4
+        self.logprob_thold = -1.0
+        
+        self._gpu_available: Optional[bool] = None
+        self._alsa_io = None
         
         # Verify model and binary exist
         if not os.path.exists(self.model_path):
@@ -32,6 +83,24 @@ class WhisperCppASR:
         
         if not os.path.exists(self.whisper_binary):
             raise FileNotFoundError(f"Whisper binary not found at {self.whisper_binary}")
+        
+        # Persistent whisper-server next to the CLI binary (model stays loaded between
+        # utterances), launched on the first transcription
+        server_args = ["--language", "en", "--threads", str(_physical_cores()), *self._decode_params()]
+        if not self._check_gpu_available():
+            server_args.append("--no-gpu")
+        self._server = WhisperServer(
+            os.path.join(os.path.dirname(self.whisper_binary), "whisper-server"),
+            self.model_path, extra_args=server_args
+        )
+    
+    def close(self) -> None:
+        """Stop the whisper-server process and release the capture device"""
+        if self._alsa_io is not None:
+            self._alsa_io.close()
+            self._alsa_io = None
+        
+        self._server.close()
     
     def transcribe_audio(self, audio_data: np.ndarray, 
                         sample_rate: int = 16000,
@@ -41,7 +110,7 @@ class WhisperCppASR:
         Args:
             audio_data: Audio data as numpy array
             sample_rate: Sample rate of audio
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of retries after a failed run
         Returns:
             List of transcription results with confidence scores
         """
@@ -61,11 +130,16 @@ class WhisperCppASR:
             max_samples = int(self.max_segment_duration * sample_rate)
             audio_data = audio_data[:max_samples]
         
-        # Try transcription with retries
+        # Skip the whisper.cpp run for clips that are effectively silent
+        if not self._energy_gate(audio_data):
+            logger.info("Audio below energy threshold, skipping transcription")
+            return []
+        
+        # Retry only when whisper.cpp fails; low confidence is handled by its own temperature fallback
         for attempt in range(max_retries + 1):
             try:
                 result = self._transcribe_with_whisper(audio_data, sample_rate, attempt)
-                if result:
+                if result is not None:
                     return result
             except Exception as e:
                 logger.error(f"Transcription attempt {attempt + 1} failed: {e}")
@@ -75,60 +149,93 @@ class WhisperCppASR:
         
         return []
     
+    def _energy_gate(self, audio_data: np.ndarray) -> bool:
+        """Check whether a clip carries enough energy to be worth decoding"""
+        x = audio_data.reshape(-1).astype(np.float32, copy=False)
+        mean_square = float(np.dot(x, x)) / x.size
+        if audio_data.dtype == np.int16:
+            mean_square /= 32768.0 ** 2
+        return mean_square > self.energy_threshold
+    
     def _transcribe_with_whisper(self, audio_data: np.ndarray, 
                                 sample_rate: int, 
-                                attempt: int) -> List[Dict[str, float]]:
-        """Transcribe audio with Whisper.cpp"""
-        
-        # Create temporary WAV file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            temp_path = temp_file.name
-        
+                                attempt: int) -> Optional[List[Dict[str, float]]]:
+        """Transcribe audio with Whisper.cpp, returning None if the run failed"""
         try:
-            # Write audio to WAV file
-            self._write_wav_file(temp_path, audio_data, sample_rate)
-            
-            # Build Whisper.cpp command
-            cmd = self._build_whisper_command(temp_path, attempt)
-            
-            # Run Whisper.cpp
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=15.0  # 15 second timeout
-            )
-            
-            if result.returncode != 0:
-                logger.error(f"Whisper.cpp failed (attempt {attempt + 1}): {result.stderr}")
-                return []
+            # Encode WAV in memory; sent to the server, or piped to the CLI's stdin
+            wav_bytes = self._encode_wav(audio_data, sample_rate)
             
-            # Parse output
-            transcriptions = self._parse_whisper_output(result.stdout)
+            transcriptions = None
+            server_url = self._server.start()
+            if server_url:
+                try:
+                    transcriptions = self._transcribe_with_server(server_url, wav_bytes)
+                except (requests.RequestException, ValueError) as e:
+                    logger.error(f"whisper-server request failed, using CLI: {e}")
             
-            # Check if we need to retry with higher temperature
-            if attempt == 0 and transcriptions:
-                best_confidence = max(t.get('confidence', 0) for t in transcriptions)
-                if best_confidence < 0.7:
-                    logger.info(f"Low confidence ({best_confidence:.2f}), will retry with higher temperature")
-                    return []  # Force retry
+            if transcriptions is None:
+                # Build Whisper.cpp command
+                cmd = self._build_whisper_command("-")
+                
+                # Run Whisper.cpp
+                result = subprocess.run(
+                    cmd,
+                    input=wav_bytes,
+                    capture_output=True,
+                    timeout=15.0  # 15 second timeout
+                )
+                
+                if result.returncode != 0:
+                    logger.error(f"Whisper.cpp failed (attempt {attempt + 1}): {result.stderr.decode(errors='replace')}")
+                    return None
+                
+                # Parse output
+                transcriptions = self._parse_whisper_output(result.stdout)
             
             return transcriptions
             
         except subprocess.TimeoutExpired:
             logger.error(f"Whisper.cpp timeout (attempt {attempt + 1})")
-            return []
+            return None
         except Exception as e:
             logger.error(f"Error in transcription (attempt {attempt + 1}): {e}")
+            return None
+    
+    def _transcribe_with_server(self, server_url: str, wav_bytes: bytes) -> List[Dict[str, float]]:
+        """Transcribe through the persistent whisper-server"""
+        response = requests.post(
+            f"{server_url}/inference",
+            files={'file': ('audio.wav', wav_bytes, 'audio/wav')},
+            data={
+                # Same temperature fallback as the CLI path
+                'temperature': str(self.temperature),
+                'temperature_inc': str(self.temperature_inc),
+                'response_format': 'verbose_json'
+            },
+            timeout=15.0
+        )
+        response.raise_for_status()
+        result = response.json()
+        
+        text = result.get('text', '').strip()
+        if not text:
             return []
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
+        
+        # Derive confidence from segment log-probs
+        logprobs = [seg['avg_logprob'] for seg in result.get('segments', []) if 'avg_logprob' in seg]
+        confidence = float(np.exp(np.mean(logprobs))) if logprobs else 0.5
+        return [{'text': text, 'confidence': confidence}]
+    
+    def _decode_params(self) -> List[str]:
+        """Beam-search flags: greedy for small models on CPU, best-of/beam 5 otherwise"""
+        model_name = os.path.basename(self.model_path).lower()
+        greedy = not self._check_gpu_available() and any(size in model_name for size in self._SMALL_MODELS)
+        default = 1 if greedy else 5
+        best_of = self.best_of if self.best_of is not None else default
+        beam_size = self.beam_size if self.beam_size is not None else default
+        return ["--best-of", str(best_of), "--beam-size", str(beam_size)]
     
-    def _build_whisper_command(self, audio_path: str, attempt: int) -> List[str]:
+    def _build_whisper_command(self, audio_path: str) -> List[str]:
         """Build Whisper.cpp command with appropriate flags"""
         
         # Base command
@@ -137,94 +244,83 @@ class WhisperCppASR:
             "-m", self.model_path,
             "-f", audio_path,
             "--language", "en",
-            "--threads", str(os.cpu_count() or 4),
-            "--best-of", "5",
-            "--beam-size", "5",
+            "--threads", str(_physical_cores()),
+            *self._decode_params(),
             "--vad",
             "--no-timestamps",
             "--print-colors", "false"
         ]
         
-        # Temperature based on attempt
-        if attempt == 0:
-            cmd.extend(["-t", "0.0"])  # Low temperature for first attempt
-        else:
-            cmd.extend(["-t", "0.2"])  # Slightly higher temperature for retry
+        # Start at temperature 0; whisper.cpp re-decodes at higher temperature when a segment
+        # fails the entropy/log-prob thresholds, so no second process is needed
+        cmd.extend([
+            "--temperature", str(self.temperature),
+            "--temperature-inc", str(self.temperature_inc),
+            "--entropy-thold", str(self.entropy_thold),
+            "--logprob-thold", str(self.logprob_thold)
+        ])
         
-        # Add GPU acceleration if available
+        # Add GPU acceleration if available, otherwise skip GPU context setup
         if self._check_gpu_available():
             cmd.extend(["--gpu", "1"])
+        else:
+            cmd.append("--no-gpu")
         
         return cmd
     
     def _check_gpu_available(self) -> bool:
-        """Check if GPU acceleration is available"""
-        try:
-            result = subprocess.run(
-                ["nvidia-smi"],
-                capture_output=True,
-                timeout=2.0
-            )
-            return result.returncode == 0
-        except:
-            return False
+        """Check if GPU acceleration is available (probed once per instance)"""
+        if self._gpu_available is None:
+            self._gpu_available = self._probe_gpu()
+        return self._gpu_available
+    
+    def _probe_gpu(self) -> bool:
+        """Detect an NVIDIA GPU from the driver's device nodes, without forking nvidia-smi"""
+        return os.path.isdir('/proc/driver/nvidia/gpus') or os.path.exists('/dev/nvidia0')
+    
+    def _encode_wav(self, audio_data: np.ndarray, sample_rate: int) -> bytearray:
+        """Encode mono audio as an in-memory 16-bit PCM WAV"""
+        # Audio captured into an alloc_wav body already sits behind header space and
+        # is finished in place; anything else is copied or converted into a new buffer
+        return encode_wav(audio_data, sample_rate)
     
     def _write_wav_file(self, file_path: str, audio_data: np.ndarray, sample_rate: int) -> None:
-        """Write numpy array to WAV file"""
+        """Write numpy array to WAV file (for debugging; transcription pipes WAV over stdin)"""
         try:
-            # Convert to int16
-            audio_int16 = (audio_data * 32767).astype(np.int16)
-            
-            # Write WAV file
-            with wave.open(file_path, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # Mono
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(sample_rate)
-                wav_file.writeframes(audio_int16.tobytes())
+            # Header and samples are already laid out in one buffer; write it in a single call
+            wav = self._encode_wav(audio_data, sample_rate)
+            fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                written = os.write(fd, wav)
+            finally:
+                os.close(fd)
+            if written != len(wav):
+                raise OSError(f"Short write to {file_path}: {written} bytes")
                 
         except Exception as e:
             logger.error(f"Error writing WAV file: {e}")
             raise
     
-    def _parse_whisper_output(self, output: str) -> List[Dict[str, float]]:
-        """Parse Whisper.cpp output to extract transcriptions and confidence"""
+    def _parse_whisper_output(self, output: bytes) -> List[Dict[str, float]]:
+        """Parse raw Whisper.cpp stdout, decoding only the matched text"""
         transcriptions = []
-        lines = output.strip().split('\n')
         
-        for line in lines:
+        # Format: "text [confidence: 0.xx]"; lines without a score get medium confidence
+        for line in output.splitlines():
             line = line.strip()
             if not line:
                 continue
             
-            # Extract text and confidence from Whisper output
-            # Format: "text [confidence: 0.xx]"
-            if '[' in line and ']' in line:
-                text = line.split('[')[0].strip()
-                conf_part = line.split('[')[1].split(']')[0]
-                
-                if 'confidence:' in conf_part:
-                    try:
-                        confidence = float(conf_part.split('confidence:')[1].strip())
-                        transcriptions.append({
-                            'text': text,
-                            'confidence': confidence
-                        })
-                    except ValueError:
-                        transcriptions.append({
-                            'text': text,
-                            'confidence': 0.5
-                        })
-                else:
-                    transcriptions.append({
-                        'text': text,
-                        'confidence': 0.5
-                    })
-            else:
-                # No confidence score, assume medium confidence
-                transcriptions.append({
-                    'text': line,
-                    'confidence': 0.5
-                })
+            m = self._CONF_RE.match(line)
+            text, conf = m.groups() if m else (line, None)
+            try:
+                confidence = float(conf) if conf else 0.5
+            except ValueError:
+                confidence = 0.5
+            transcriptions.append({
+                'text': text.decode('utf-8', 'replace'),
+                'confidence': confidence
+            })
         
         # Sort by confidence (highest first)
         transcriptions.sort(key=lambda x: x.get('confidence', 0), reverse=True)
@@ -240,12 +336,7 @@ class WhisperCppASR:
             Best transcription result
         """
         try:
-            # Import ALSA I/O
-            from .alsa_io import ALSAIO
-            
-            # Record audio
-            alsa_io = ALSAIO()
-            audio_data = alsa_io.record_audio(duration_seconds, self.sample_rate)
+            audio_data = self.record_segment(duration_seconds)
             
             if audio_data is None or len(audio_data) == 0:
                 logger.error("Failed to record audio")
@@ -264,8 +355,20 @@ class WhisperCppASR:
             logger.error(f"Error in real-time transcription: {e}")
             return []
     
-    def get_model_info(self) -> Dict[str, str]:
-        """Get information about the loaded model"""
+    def record_segment(self, duration_seconds: float) -> Optional[np.ndarray]:
+        """Record raw int16 audio straight into the body of a WAV buffer"""
+        if self._alsa_io is None:
+            # Import ALSA I/O; the device stays configured between recordings
+            from .alsa_io import ALSAIO
+            self._alsa_io = ALSAIO()
+        
+        # A fresh buffer per segment, so a capture can overlap the previous decode
+        samples = alloc_wav(int(duration_seconds * self.sample_rate))
+        return self._alsa_io.record_audio_raw(duration_seconds, self.sample_rate, out=samples)
+    
+    @functools.cached_property
+    def model_info(self) -> Dict[str, str]:
+        """Information about the loaded model (fixed for the life of the instance)"""
         return {
             'model_path': self.model_path,
             'model_name': os.path.basename(self.model_path),
@@ -281,6 +384,11 @@ class WhisperASRManager:
         self.asr = None
         self.is_recording = False
         self.recording_thread = None
+        # Captured segments waiting for the single long-lived transcription worker
+        self._audio_queue: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._status: Optional[Dict[str, Any]] = None
+        self._status_key = None
         
     def initialize(self) -> bool:
         """Initialize ASR system"""
@@ -293,30 +401,58 @@ class WhisperASRManager:
             return False
     
     def start_recording(self, duration_seconds: float = 5.0) -> None:
-        """Start recording in background thread"""
+        """Start recording in background thread; transcription runs on the shared worker"""
         if self.is_recording:
             return
         
+        if not self.asr:
+            logger.error("ASR not initialized")
+            return
+        
+        self._ensure_worker()
         self.is_recording = True
         
-        def record_and_transcribe():
+        def record():
             try:
-                if self.asr:
-                    result = self.asr.transcribe_realtime(duration_seconds)
-                    if result:
-                        logger.info(f"Transcription result: {result[0]['text']} (confidence: {result[0]['confidence']:.2f})")
-                    else:
-                        logger.warning("No transcription result")
+                audio_data = self.asr.record_segment(duration_seconds)
+                if audio_data is not None and len(audio_data) > 0:
+                    # Hand off and return, so the next capture can overlap this decode
+                    self._audio_queue.put(audio_data)
                 else:
-                    logger.error("ASR not initialized")
+                    logger.error("Failed to record audio")
             except Exception as e:
                 logger.error(f"Recording error: {e}")
             finally:
                 self.is_recording = False
         
-        self.recording_thread = threading.Thread(target=record_and_transcribe, daemon=True)
+        self.recording_thread = threading.Thread(target=record, daemon=True)
         self.recording_thread.start()
     
+    def _ensure_worker(self) -> None:
+        """Start the transcription worker if it is not running"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._transcribe_worker, daemon=True)
+            self._worker.start()
+    
+    def _transcribe_worker(self) -> None:
+        """Transcribe captured segments in order as they arrive"""
+        while True:
+            audio_data = self._audio_queue.get()
+            try:
+                result = self.asr.transcribe_audio(audio_data, self.asr.sample_rate)
+                if result:
+                    logger.info(f"Transcription result: {result[0]['text']} (confidence: {result[0]['confidence']:.2f})")
+                else:
+                    logger.warning("No transcription result")
+            except Exception as e:
+                logger.error(f"Transcription error: {e}")
+            finally:
+                self._audio_queue.task_done()
+    
+    def wait_until_idle(self) -> None:
+        """Block until every captured segment has been transcribed"""
+        self._audio_queue.join()
+    
     def stop_recording(self) -> None:
         """Stop recording"""
         self.is_recording = False
@@ -332,12 +468,21 @@ class WhisperASRManager:
         return self.asr.transcribe_audio(audio_data, sample_rate)
     
     def get_status(self) -> Dict[str, Any]:
-        """Get ASR status"""
-        return {
-            'initialized': self.asr is not None,
-            'recording': self.is_recording,
-            'model_info': self.asr.get_model_info() if self.asr else None
-        }
+        """Get ASR status (rebuilt only when the ASR or recording state changes)"""
+        key = (self.asr, self.is_recording)
+        if self._status is None or key != self._status_key:
+            self._status = {
+                'initialized': self.asr is not None,
+                'recording': self.is_recording,
+                'model_info': self.asr.model_info if self.asr else None
+            }
+            self._status_key = key
+        
+        # Copies, so a caller editing the result cannot change the cache (or model_info)
+        status = dict(self._status)
+        if status['model_info'] is not None:
+            status['model_info'] = dict(status['model_info'])
+        return status
 
 def main():
     """Main function for testing"""
@@ -365,6 +510,7 @@ def main():
         time.sleep(0.1)
     
     print("Recording completed")
+    asr_manager.wait_until_idle()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,102 @@
+"""
+Shared 16-bit PCM helpers: float to int16 conversion and WAV encoding
+"""
+
+import os
+import struct
+from typing import Optional
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# RIFF/WAVE header for 16-bit PCM
+WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def f32_to_s16(inp: np.ndarray, out: np.ndarray) -> None:
+        """Scale to int16 with rounding and saturation in one pass"""
+        for i in range(inp.size):
+            v = inp[i] * 32767.0
+            if v > 32767.0:
+                v = 32767.0
+            elif v < -32768.0:
+                v = -32768.0
+            out[i] = np.int16(v + 0.5) if v >= 0 else np.int16(v - 0.5)
+else:
+    def f32_to_s16(inp: np.ndarray, out: np.ndarray) -> None:
+        """Scale to int16 with rounding and saturation"""
+        np.copyto(out, np.clip(np.rint(inp * 32767.0), -32768, 32767), casting='unsafe')
+
+def pack_wav_header(buf, data_size: int, sample_rate: int, channels: int = 1) -> None:
+    """Pack a 16-bit PCM WAV header into the start of buf"""
+    WAV_HEADER.pack_into(buf, 0, b'RIFF', 36 + data_size, b'WAVE', b'fmt ', 16, 1,
+                         channels, sample_rate, sample_rate * channels * 2,
+                         channels * 2, 16,  # 16-bit
+                         b'data', data_size)
+
+def alloc_wav(n_samples: int) -> np.ndarray:
+    """Allocate a WAV buffer and return its int16 body, so capture can write in place"""
+    wav = bytearray(WAV_HEADER.size + n_samples * 2)
+    return np.frombuffer(wav, dtype=np.int16, offset=WAV_HEADER.size)
+
+def wav_buffer(samples: np.ndarray) -> Optional[bytearray]:
+    """
+    WAV buffer behind an alloc_wav body
+    Returns:
+        The bytearray if samples is exactly its body, None for any other array
+        (including a prefix left by a short capture)
+    """
+    # frombuffer keeps a memoryview of the bytearray as base, not the bytearray itself
+    base = samples.base
+    wav = base.obj if isinstance(base, memoryview) else None
+    if not isinstance(wav, bytearray) or samples.dtype != np.int16 or not samples.flags.c_contiguous:
+        return None
+    if len(wav) != WAV_HEADER.size + samples.nbytes:
+        return None
+    
+    # Same size is not enough: the samples must start right after the header
+    body = np.frombuffer(wav, dtype=np.int16, offset=WAV_HEADER.size)
+    if samples.ctypes.data != body.ctypes.data:
+        return None
+    return wav
+
+def encode_wav(audio_data: np.ndarray, sample_rate: int, channels: int = 1) -> bytearray:
+    """
+    Encode audio as an in-memory 16-bit PCM WAV
+    An alloc_wav body is finished in place; other int16 is copied, float is converted
+    """
+    data_size = audio_data.size * 2
+    wav = wav_buffer(audio_data)
+    if wav is not None:
+        pack_wav_header(wav, data_size, sample_rate, channels)
+        return wav
+    
+    wav = bytearray(WAV_HEADER.size + data_size)
+    pack_wav_header(wav, data_size, sample_rate, channels)
+    samples = np.frombuffer(wav, dtype=np.int16, offset=WAV_HEADER.size)
+    if audio_data.dtype == np.int16:
+        samples[:] = audio_data.reshape(-1)
+    else:
+        f32_to_s16(np.ascontiguousarray(audio_data, dtype=np.float32).reshape(-1), samples)
+    return wav
+
+def write_wav(file_path, audio_int16: np.ndarray, sample_rate: int, channels: int = 1,
+              mode: int = 0o644) -> None:
+    """Write int16 samples as a WAV file"""
+    audio_int16 = np.ascontiguousarray(audio_int16)
+    data_size = audio_int16.nbytes
+    header = bytearray(WAV_HEADER.size)
+    pack_wav_header(header, data_size, sample_rate, channels)
+
+    # Write header and samples in one scatter/gather call, no intermediate bytes copy
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        written = os.writev(fd, [header, memoryview(audio_int16).cast('B')])
+    finally:
+        os.close(fd)
+    if written != len(header) + data_size:
+        raise OSError(f"Short write to {file_path}: {written} bytes")
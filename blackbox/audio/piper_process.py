@@ -0,0 +1,269 @@
+"""
+Long-running Piper process shared by the TTS front ends
+Keeps the voice model loaded and feeds it one line of text per utterance,
+reading back either a WAV path (--output_dir) or streamed PCM (--output-raw)
+"""
+
+import os
+import time
+import shutil
+import select
+import tempfile
+import threading
+import subprocess
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Reused stdout read buffer, ~2 s of 16-bit mono at 22050 Hz
+_READ_BUFFER_BYTES = 88200
+
+# Piper logs this after each utterance, once its raw audio has been flushed to stdout.
+# Raw mode has no other end-of-utterance signal, so this ties stream() to the log
+# format of the piper CLI 1.2.0 (release 2023.11.14-2, pinned in scripts/install_models.sh
+# and bin/install_models.sh); a build without the line makes every stream() call end in
+# its idle timeout
+_UTTERANCE_DONE = b"Real-time factor"
+
+# CPUs the process may use, taken at import before any thread pins itself; restores
+# the cgroup/cpuset-limited mask rather than every CPU in the machine
+_PROCESS_AFFINITY = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else None
+
+def _reset_scheduling(pid: int) -> None:
+    """
+    Drop the SCHED_FIFO policy and single-core pinning a child inherits when a
+    real-time thread (re)starts it; applied from the parent right after Popen,
+    since preexec_fn is unsafe with other threads running
+    """
+    try:
+        os.sched_setscheduler(pid, os.SCHED_OTHER, os.sched_param(0))
+        if _PROCESS_AFFINITY is not None:
+            os.sched_setaffinity(pid, _PROCESS_AFFINITY)
+    except (AttributeError, OSError):
+        pass
+
+class PiperProcess:
+    """Persistent Piper process; each stdin line is one utterance"""
+
+    def __init__(self, model_path: str, config_path: str,
+                 timeout: float = 5.0, load_timeout: float = 30.0,
+                 output_raw: bool = False, sentence_silence: Optional[float] = None):
+        self.model_path = model_path
+        self.config_path = config_path
+        self.timeout = timeout
+        self.load_timeout = load_timeout  # First reply also covers the model load
+        self.output_raw = output_raw
+        self.sentence_silence = sentence_silence
+        self._proc: Optional[subprocess.Popen] = None
+        self._warm = False
+        self._stdout_buf = b""
+        self._stderr_buf = b""
+        self._read_buf = bytearray(_READ_BUFFER_BYTES) if output_raw else None
+        self._lock = threading.Lock()
+
+        # In file mode Piper writes its WAVs here; tmpfs when available
+        self.output_dir = None
+        if not output_raw:
+            base_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            self.output_dir = tempfile.mkdtemp(prefix="blackbox-piper-", dir=base_dir)
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether the Piper process is running"""
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> bool:
+        """Launch Piper (loads the model once)"""
+        if self.is_alive:
+            return True
+
+        cmd = [
+            "piper",
+            "--model", self.model_path,
+            "--config", self.config_path
+        ]
+        if self.output_raw:
+            cmd.append("--output-raw")
+        else:
+            # close() removes the directory; a restarted process needs it back
+            os.makedirs(self.output_dir, exist_ok=True)
+            cmd.extend(["--output_dir", self.output_dir])
+        if self.sentence_silence is not None:
+            cmd.extend(["--sentence_silence", str(self.sentence_silence)])
+
+        try:
+            # Raw mode watches stderr for the end-of-utterance log line
+            self._proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE if self.output_raw else subprocess.DEVNULL,
+                bufsize=0
+            )
+            _reset_scheduling(self._proc.pid)
+            self._stdout_buf = b""
+            self._stderr_buf = b""
+            self._warm = False
+            return True
+        except OSError as e:
+            logger.error(f"Failed to start Piper: {e}")
+            self._proc = None
+            return False
+
+    def synthesize(self, text: str) -> Optional[str]:
+        """
+        Synthesize one utterance
+        Args:
+            text: Text to speak (newlines are folded, Piper reads one line per utterance)
+        Returns:
+            Path of the WAV file Piper wrote, owned by the caller, or None if failed
+        """
+        text = " ".join(text.split())
+        if not text:
+            return None
+
+        with self._lock:
+            if not self.start():
+                return None
+
+            try:
+                self._proc.stdin.write(text.encode("utf-8") + b"\n")
+                wav_path = self._readline().decode("utf-8", "replace").strip()
+                self._warm = True
+            except (OSError, TimeoutError, EOFError) as e:
+                logger.error(f"Piper synthesis failed: {e}")
+                # Restart on the next call rather than reading a stale reply
+                self._kill()
+                return None
+
+        if not wav_path or not os.path.exists(wav_path):
+            logger.error(f"Piper did not produce audio for: {text!r}")
+            return None
+
+        return wav_path
+
+    def stream(self, text: str, sink: Callable[[memoryview], None], frame_bytes: int = 2) -> bool:
+        """
+        Synthesize one utterance and hand its PCM to sink as it arrives (raw mode)
+        Args:
+            text: Text to speak
+            sink: Called with each chunk of S16_LE audio, always whole frames; the
+                  view is only valid during the call
+            frame_bytes: Bytes per frame, chunks are split on this boundary
+        Returns:
+            True if the whole utterance was synthesized and delivered
+        """
+        text = " ".join(text.split())
+        if not text:
+            return False
+
+        with self._lock:
+            if not self.start():
+                return False
+
+            try:
+                self._proc.stdin.write(text.encode("utf-8") + b"\n")
+                delivered = self._pump(sink, frame_bytes)
+                self._warm = True
+                return delivered
+            except (OSError, TimeoutError, EOFError) as e:
+                logger.error(f"Piper synthesis failed: {e}")
+                self._kill()
+                return False
+
+    def _pump(self, sink: Callable[[memoryview], None], frame_bytes: int) -> bool:
+        """Forward stdout to sink until Piper reports the utterance finished"""
+        out_fd = self._proc.stdout.fileno()
+        err_fd = self._proc.stderr.fileno()
+        buf = self._read_buf
+        view = memoryview(buf)
+        held = 0  # Bytes of an incomplete frame carried at the front of buf
+        sink_ok = True
+
+        def read_and_deliver() -> bool:
+            nonlocal held, sink_ok
+            # Read straight into the reused buffer, no per-chunk bytes objects
+            count = os.readv(out_fd, [view[held:]])
+            if count == 0:
+                return False
+            total = held + count
+            cut = total - total % frame_bytes
+            if cut and sink_ok:
+                try:
+                    sink(view[:cut])
+                except Exception as e:
+                    # Keep draining so the next utterance starts clean
+                    logger.error(f"Audio sink failed: {e}")
+                    sink_ok = False
+            held = total - cut
+            if held:
+                buf[:held] = buf[cut:total]
+            return True
+
+        timeout = self.timeout if self._warm else self.load_timeout
+        while True:
+            # Idle timeout: a long utterance keeps streaming, a hung Piper does not
+            ready = select.select([out_fd, err_fd], [], [], timeout)[0]
+            if not ready:
+                raise TimeoutError("Piper synthesis timeout")
+
+            if out_fd in ready and not read_and_deliver():
+                raise EOFError("Piper exited")
+
+            if err_fd in ready:
+                data = os.read(err_fd, 4096)
+                if not data:
+                    raise EOFError("Piper exited")
+                self._stderr_buf += data
+                marker = self._stderr_buf.find(_UTTERANCE_DONE)
+                end = self._stderr_buf.find(b"\n", marker) if marker >= 0 else -1
+                if end < 0:
+                    # Keep only the unfinished line
+                    self._stderr_buf = self._stderr_buf[self._stderr_buf.rfind(b"\n") + 1:]
+                    continue
+                self._stderr_buf = self._stderr_buf[end + 1:]
+
+                # The audio was written before the log line; collect what is still in the pipe
+                while select.select([out_fd], [], [], 0)[0] and read_and_deliver():
+                    pass
+                return sink_ok
+
+    def _readline(self) -> bytes:
+        """Read one line of Piper stdout, giving up after the synthesis timeout"""
+        fd = self._proc.stdout.fileno()
+        deadline = time.monotonic() + (self.timeout if self._warm else self.load_timeout)
+        while b"\n" not in self._stdout_buf:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError("Piper synthesis timeout")
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                raise EOFError("Piper exited")
+            self._stdout_buf += chunk
+
+        line, _, self._stdout_buf = self._stdout_buf.partition(b"\n")
+        return line
+
+    def _kill(self) -> None:
+        """Terminate the Piper process"""
+        if self._proc is None:
+            return
+
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        self._proc.terminate()
+        try:
+            self._proc.wait(timeout=2.0)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._proc = None
+
+    def close(self) -> None:
+        """Stop Piper and remove its output directory"""
+        with self._lock:
+            self._kill()
+        if self.output_dir:
+            shutil.rmtree(self.output_dir, ignore_errors=True)
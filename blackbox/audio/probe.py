@@ -4,27 +4,52 @@ Discovers and maps audio devices by name for reliable selection
 """
 
 import os
+import re
+import copy
 import json
+import errno
+import ctypes
 import subprocess
 import logging
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+from .alsa_io import _libasound, SND_PCM_STREAM_PLAYBACK, SND_PCM_STREAM_CAPTURE, SND_PCM_NONBLOCK
+
 logger = logging.getLogger(__name__)
 
 class AudioDeviceProbe:
     """Probe and configure audio devices"""
     
+    # Line like: "card 1: USB [USB PnP Sound Device], device 0: USB Audio [USB Audio]"
+    _CARD_RE = re.compile(r'^card (\d+):[^,\n]*,\s*device (\d+):[^\[\n]*\[([^\]\n]+)\]', re.MULTILINE)
+    
+    # Parsed configs shared by all instances, keyed by path and file identity
+    _config_cache: Dict[Tuple[str, int, int, int], Dict[str, List[Dict]]] = {}
+    
     def __init__(self, config_path: str = "/mnt/nvme/blackbox/config/audio.json"):
         self.config_path = config_path
-        self.devices = {}
-        self.load_config()
+        self._devices: Optional[Dict[str, List[Dict]]] = None
+    
+    @property
+    def devices(self) -> Dict[str, List[Dict]]:
+        """Device configuration, read from disk on first access"""
+        if self._devices is None:
+            self.load_config()
+        return self._devices
+    
+    @devices.setter
+    def devices(self, value: Dict[str, List[Dict]]) -> None:
+        self._devices = value
     
     def probe_devices(self) -> Dict[str, Dict]:
         """Probe all available audio devices"""
+        # arecord -l and aplay -l are independent; run them concurrently
+        input_proc = self._spawn_list_command('arecord')
+        output_proc = self._spawn_list_command('aplay')
         devices = {
-            'input': self._probe_input_devices(),
-            'output': self._probe_output_devices()
+            'input': self._collect_card_list(input_proc, 'arecord', 'input'),
+            'output': self._collect_card_list(output_proc, 'aplay', 'output')
         }
         
         # Save configuration
@@ -32,141 +57,50 @@ class AudioDeviceProbe:
         
         return devices
     
-    def _probe_input_devices(self) -> List[Dict]:
-        """Probe input devices using arecord -l"""
+    def _spawn_list_command(self, tool: str) -> Optional[subprocess.Popen]:
+        """Start `tool -l` without waiting for it"""
         try:
-            result = subprocess.run(
-                ['arecord', '-l'],
-                capture_output=True,
-                text=True,
-                timeout=10
+            return subprocess.Popen(
+                [tool, '-l'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
             )
-            
-            if result.returncode != 0:
-                logger.error(f"arecord -l failed: {result.stderr}")
-                return []
-            
-            return self._parse_arecord_output(result.stdout)
-            
-        except subprocess.TimeoutExpired:
-            logger.error("arecord -l timeout")
-            return []
         except Exception as e:
-            logger.error(f"Error probing input devices: {e}")
-            return []
+            logger.error(f"Error running {tool} -l: {e}")
+            return None
     
-    def _probe_output_devices(self) -> List[Dict]:
-        """Probe output devices using aplay -l"""
+    def _collect_card_list(self, proc: Optional[subprocess.Popen], tool: str, device_type: str) -> List[Dict]:
+        """Wait for a `tool -l` process and parse its device list"""
+        if proc is None:
+            return []
+        
         try:
-            result = subprocess.run(
-                ['aplay', '-l'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode != 0:
-                logger.error(f"aplay -l failed: {result.stderr}")
-                return []
-            
-            return self._parse_aplay_output(result.stdout)
-            
+            stdout, stderr = proc.communicate(timeout=10)
         except subprocess.TimeoutExpired:
-            logger.error("aplay -l timeout")
-            return []
-        except Exception as e:
-            logger.error(f"Error probing output devices: {e}")
+            proc.kill()
+            proc.communicate()
+            logger.error(f"{tool} -l timeout")
             return []
-    
-    def _parse_arecord_output(self, output: str) -> List[Dict]:
-        """Parse arecord -l output"""
-        devices = []
-        lines = output.strip().split('\n')
         
-        for line in lines:
-            if 'card' in line and 'device' in line:
-                # Parse line like: "card 1: USB [USB PnP Sound Device], device 0: USB Audio [USB Audio]"
-                parts = line.split(',')
-                if len(parts) >= 2:
-                    card_part = parts[0].strip()
-                    device_part = parts[1].strip()
-                    
-                    # Extract card number
-                    card_num = None
-                    if 'card' in card_part:
-                        try:
-                            card_num = int(card_part.split('card')[1].split(':')[0].strip())
-                        except (ValueError, IndexError):
-                            pass
-                    
-                    # Extract device number
-                    device_num = None
-                    if 'device' in device_part:
-                        try:
-                            device_num = int(device_part.split('device')[1].split(':')[0].strip())
-                        except (ValueError, IndexError):
-                            pass
-                    
-                    # Extract device name
-                    device_name = None
-                    if '[' in device_part and ']' in device_part:
-                        device_name = device_part.split('[')[1].split(']')[0]
-                    
-                    if card_num is not None and device_num is not None and device_name:
-                        devices.append({
-                            'card': card_num,
-                            'device': device_num,
-                            'name': device_name,
-                            'hw_id': f"hw:{card_num},{device_num}",
-                            'type': 'input'
-                        })
+        if proc.returncode != 0:
+            logger.error(f"{tool} -l failed: {stderr}")
+            return []
         
-        return devices
+        return self._parse_card_list(stdout, device_type)
     
-    def _parse_aplay_output(self, output: str) -> List[Dict]:
-        """Parse aplay -l output"""
-        devices = []
-        lines = output.strip().split('\n')
-        
-        for line in lines:
-            if 'card' in line and 'device' in line:
-                # Parse line like: "card 1: USB [USB PnP Sound Device], device 0: USB Audio [USB Audio]"
-                parts = line.split(',')
-                if len(parts) >= 2:
-                    card_part = parts[0].strip()
-                    device_part = parts[1].strip()
-                    
-                    # Extract card number
-                    card_num = None
-                    if 'card' in card_part:
-                        try:
-                            card_num = int(card_part.split('card')[1].split(':')[0].strip())
-                        except (ValueError, IndexError):
-                            pass
-                    
-                    # Extract device number
-                    device_num = None
-                    if 'device' in device_part:
-                        try:
-                            device_num = int(device_part.split('device')[1].split(':')[0].strip())
-                        except (ValueError, IndexError):
-                            pass
-                    
-                    # Extract device name
-                    device_name = None
-                    if '[' in device_part and ']' in device_part:
-                        device_name = device_part.split('[')[1].split(']')[0]
-                    
-                    if card_num is not None and device_num is not None and device_name:
-                        devices.append({
-                            'card': card_num,
-                            'device': device_num,
-                            'name': device_name,
-                            'hw_id': f"hw:{card_num},{device_num}",
-                            'type': 'output'
-                        })
-        
-        return devices
+    def _parse_card_list(self, output: str, device_type: str) -> List[Dict]:
+        """Parse arecord -l / aplay -l output"""
+        return [
+            {
+                'card': int(m[1]),
+                'device': int(m[2]),
+                'name': m[3],
+                'hw_id': f"hw:{m[1]},{m[2]}",
+                'type': device_type
+            }
+            for m in self._CARD_RE.finditer(output)
+        ]
     
     def find_device_by_name(self, device_name: str, device_type: str) -> Optional[Dict]:
         """Find device by name"""
@@ -223,25 +157,52 @@ class AudioDeviceProbe:
     def load_config(self) -> None:
         """Load device configuration from JSON file"""
         try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r') as f:
-                    self.devices = json.load(f)
-                logger.info(f"Audio device configuration loaded from {self.config_path}")
-            else:
-                self.devices = {'input': [], 'output': []}
-                logger.info("No audio configuration found, will probe devices")
-                
+            with open(self.config_path, 'rb') as f:
+                # Reparse only when the file was replaced or modified since the last load
+                st = os.fstat(f.fileno())
+                key = (self.config_path, st.st_ino, st.st_mtime_ns, st.st_size)
+                cached = self._config_cache.get(key)
+                if cached is None:
+                    cached = self._config_cache[key] = json.load(f)
+            # The cache is shared by all instances; hand each one its own copy to edit
+            self.devices = copy.deepcopy(cached)
+            logger.info(f"Audio device configuration loaded from {self.config_path}")
+            
+        except FileNotFoundError:
+            self.devices = {'input': [], 'output': []}
+            logger.info("No audio configuration found, will probe devices")
         except Exception as e:
             logger.error(f"Failed to load audio configuration: {e}")
             self.devices = {'input': [], 'output': []}
     
     def test_device(self, device: Dict) -> bool:
         """Test if a device is working"""
+        if _libasound is not None:
+            return self._test_device_pcm(device)
+        
         if device['type'] == 'input':
             return self._test_input_device(device)
         else:
             return self._test_output_device(device)
     
+    def _test_device_pcm(self, device: Dict) -> bool:
+        """Test a device by opening and closing its PCM through libasound"""
+        stream = SND_PCM_STREAM_CAPTURE if device['type'] == 'input' else SND_PCM_STREAM_PLAYBACK
+        handle = ctypes.c_void_p()
+        
+        # Non-blocking so a busy device fails fast instead of hanging the probe
+        ret = _libasound.snd_pcm_open(ctypes.byref(handle), device['hw_id'].encode(), stream, SND_PCM_NONBLOCK)
+        if ret == -errno.EBUSY:
+            # hw: devices take one opener; another stream holding it means it is present
+            logger.info(f"{device['type'].capitalize()} device {device['name']} is present but in use")
+            return True
+        if ret < 0:
+            logger.error(f"Error testing {device['type']} device {device['name']}: snd_pcm_open returned {ret}")
+            return False
+        
+        _libasound.snd_pcm_close(handle)
+        return True
+    
     def _test_input_device(self, device: Dict) -> bool:
         """Test input device by recording a short sample"""
         try:
@@ -4,44 +4,251 @@ Optimized for low-latency audio feedback and elderly users
 """
 
 import os
-import subprocess
-import tempfile
+import re
 import threading
 import time
-import wave
+import json
+import math
+import hashlib
+import itertools
 import numpy as np
 import sounddevice as sd
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 import logging
 import queue
 
+from .piper_process import PiperProcess
+from .pcm import WAV_HEADER, write_wav
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    # In-process Piper (piper-tts package) on ONNX Runtime
+    from piper import PiperVoice
+except ImportError:
+    PiperVoice = None
+
 logger = logging.getLogger(__name__)
 
+# Sentence boundaries for pipelined synthesis
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+if njit is not None:
+    # Signature given up front so the kernel compiles (or loads from cache) at import
+    @njit("void(int16[::1], int16[::1], int64, int64)",
+          fastmath=True, cache=True, boundscheck=False)
+    def _resample_hermite_s16(x, out, up, down):
+        """Hermite resample int16 to int16 in one pass: convert, interpolate, round, saturate"""
+        last = x.size - 1
+        inv_up = 1.0 / up
+        for k in range(out.size):
+            pos = k * down
+            i = pos // up
+            a = (pos - i * up) * inv_up
+            xm1 = np.float32(x[i - 1] if i > 0 else x[0])
+            x0 = np.float32(x[i])
+            x1 = np.float32(x[i + 1] if i < last else x[last])
+            x2 = np.float32(x[i + 2] if i + 1 < last else x[last])
+            c1 = 0.5 * (x1 - xm1)
+            c2 = xm1 - 2.5 * x0 + 2.0 * x1 - 0.5 * x2
+            c3 = 0.5 * (x2 - xm1) + 1.5 * (x0 - x1)
+            v = ((c3 * a + c2) * a + c1) * a + x0
+            if v > 32767.0:
+                v = 32767.0
+            elif v < -32768.0:
+                v = -32768.0
+            out[k] = np.int16(v + 0.5) if v >= 0 else np.int16(v - 0.5)
+
+class _PcmRing:
+    """
+    Single-producer/single-consumer int16 ring between the synthesis thread and
+    the audio callback. Each index only ever moves forward and is written by one
+    side, so neither side takes a lock.
+    """
+    
+    def __init__(self, seconds: float, sample_rate: int, poll_interval: float = 0.005):
+        # Power-of-two size so wrapping is a mask instead of a modulo
+        size = 1 << max(int(seconds * sample_rate) - 1, 1).bit_length()
+        self._buf = np.zeros(size, dtype=np.int16)
+        self._mask = size - 1
+        self._read_idx = 0    # Advanced by the consumer only
+        self._write_idx = 0   # Advanced by the producer only
+        self._flush = False   # Set by clear(), honoured by the consumer
+        self.generation = 0   # Bumped by clear() to cancel in-flight writes
+        self.poll_interval = poll_interval
+    
+    def write(self, samples: np.ndarray, generation: int) -> bool:
+        """
+        Copy samples in, waiting for the consumer while the ring is full
+        Returns:
+            False if the ring was cleared for this generation before all were queued
+        """
+        size = self._mask + 1
+        done = 0
+        while done < samples.size:
+            if self.generation != generation:
+                return False
+            
+            free = size - (self._write_idx - self._read_idx)
+            if free == 0:
+                time.sleep(self.poll_interval)
+                continue
+            
+            count = min(free, samples.size - done)
+            start = self._write_idx & self._mask
+            first = min(count, size - start)
+            self._buf[start:start + first] = samples[done:done + first]
+            self._buf[:count - first] = samples[done + first:done + count]
+            # Publish only after the samples are in place
+            self._write_idx += count
+            done += count
+        
+        return True
+    
+    def read_into(self, out: np.ndarray) -> None:
+        """Fill out from the ring, zero-padding on underrun (audio callback side)"""
+        if self._flush:
+            self._read_idx = self._write_idx
+            self._flush = False
+        
+        count = min(out.size, self._write_idx - self._read_idx)
+        start = self._read_idx & self._mask
+        first = min(count, self._mask + 1 - start)
+        # Plain C-level copies: no temporaries, nothing allocated on the audio thread
+        np.copyto(out[:first], self._buf[start:start + first])
+        np.copyto(out[first:count], self._buf[:count - first])
+        out[count:].fill(0)
+        self._read_idx += count
+    
+    @property
+    def pending(self) -> int:
+        """Samples queued but not yet played"""
+        return self._write_idx - self._read_idx
+    
+    def wait_empty(self, generation: int, timeout: float) -> None:
+        """Block until queued audio has played or the ring is cleared"""
+        deadline = time.monotonic() + timeout
+        while self.pending > 0 and self.generation == generation and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+    
+    def clear(self) -> None:
+        """Drop queued audio and cancel writes in progress"""
+        self.generation += 1
+        self._flush = True
+
+
 class PiperTTS:
     """Piper TTS with pre-loaded model and audio streaming"""
     
+    STATUS_MESSAGES = {
+        'recording_start': "Recording started. Please speak now.",
+        'recording_stop': "Recording stopped.",
+        'saved': "Password saved successfully.",
+        'retrieved': "Password retrieved.",
+        'error': "Sorry, I didn't understand. Please try again.",
+        'confirm': "Please confirm this is correct.",
+        'locked': "Vault is locked. Please enter your passphrase.",
+        'unlocked': "Vault unlocked.",
+        'timeout': "Session timed out. Please try again."
+    }
+    
+    PASSWORD_PROMPT = "I will now speak your password. Is this correct?"
+    
     def __init__(self, model_path: str = "/mnt/nvme/blackbox/models/piper/en_US-lessac-medium.onnx",
-                 config_path: str = "/mnt/nvme/blackbox/models/piper/en_US-lessac-medium.onnx.json"):
+                 config_path: str = "/mnt/nvme/blackbox/models/piper/en_US-lessac-medium.onnx.json",
+                 cache_dir: str = "/var/cache/blackbox/tts",
+                 use_gpu: bool = True):
         self.model_path = model_path
         self.config_path = config_path
+        self.use_gpu = use_gpu
+        # Core and SCHED_FIFO priority for the audio callback thread draining the
+        # output ring; None picks the last allowed core (core 3 on a 4-core Jetson)
+        self.audio_cpu: Optional[int] = None
+        self.audio_priority = 10
+        self.cache_dir = cache_dir
         self.sample_rate = 22050
         self.is_loaded = False
         self.audio_queue = queue.Queue()
         self.playback_thread = None
         self.is_playing = False
+        self.stream = None
+        self._callback_realtime = False
+        
+        # ~2 s of output between the synthesis thread and the audio callback
+        self._ring = _PcmRing(2.0, self.sample_rate)
+        # Speech feeds the ring; one writer at a time keeps it SPSC
+        self._producer_lock = threading.Lock()
+        # Short cues (beeps) bypass the ring: a (sequence, samples) handoff replaced
+        # by a single reference store, picked up and played by the callback ahead of
+        # queued speech, so a cue never waits on an utterance
+        self._cue_ids = itertools.count(1)
+        self._cue_request: Tuple[int, Optional[np.ndarray]] = (0, None)
+        self._cue_seen = 0      # Callback side only
+        self._cue: Optional[np.ndarray] = None
+        self._cue_pos = 0
+        self._resample_out = np.empty(0, dtype=np.float32)
+        self._hermite_pad = np.empty(0, dtype=np.float32)
         
-        # Pre-load model for faster response
+        # Fixed prompts, synthesized once and kept as output-rate int16
+        self._cache: Dict[str, np.ndarray] = {}
+        
+        # Beep sequences keyed by (count, duration, frequency)
+        self._beep_cache: Dict[Tuple[int, float, float], np.ndarray] = {}
+        for count, duration, frequency in AudioFeedback.BEEPS.values():
+            self._get_beep(count, duration, frequency)
+        
+        # Piper emits S16_LE at the voice's own rate; resample only if it differs
+        self.model_sample_rate = self._read_model_sample_rate()
+        
+        # One Piper process for the object lifetime; the model loads once and
+        # audio streams back on stdout while later sentences are still synthesizing
+        self._piper = PiperProcess(model_path, config_path,
+                                   output_raw=True, sentence_silence=0.2)
+        
+        # In-process voice on the GPU when available; the Piper process is the fallback
+        self._voice = None
+        
+        # Load the model and prompt cache in the background so construction
+        # returns immediately; is_loaded flips once the warmup utterance succeeds
+        # and _loaded is set then, before the cache fills
+        self._loaded = threading.Event()
+        self._loader = threading.Thread(target=self._load_in_background, daemon=True)
+        self._loader.start()
+    
+    def _load_in_background(self) -> None:
+        """Warm the model, then fill the prompt cache"""
         self._load_model()
+        # Speech can start now; prompts not cached yet are synthesized on demand
+        self._loaded.set()
+        if self.is_loaded:
+            self._warm_cache()
+    
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        """Block until the voice is loaded (not the prompt cache), returns is_loaded"""
+        self._loaded.wait(timeout)
+        return self.is_loaded
+    
+    def _read_model_sample_rate(self) -> int:
+        """Sample rate of the voice from its Piper config"""
+        try:
+            with open(self.config_path, 'r') as f:
+                return int(json.load(f)["audio"]["sample_rate"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not read voice sample rate, assuming {self.sample_rate} Hz: {e}")
+            return self.sample_rate
     
     def _load_model(self) -> None:
-        """Pre-load Piper model to keep it warm"""
+        """Load the voice once and keep the model warm"""
+        if self.use_gpu and PiperVoice is not None:
+            self._load_gpu_voice()
+        
         try:
-            # Test model loading with a short phrase
-            test_text = "Hello"
-            self._synthesize_to_file(test_text, "/tmp/piper_test.wav")
-            
-            if os.path.exists("/tmp/piper_test.wav"):
-                os.unlink("/tmp/piper_test.wav")
+            # The first utterance pays the model load once, for the object lifetime;
+            # its audio is discarded in memory, nothing touches the disk
+            if self._synthesize_stream("Hello", lambda pcm: None):
                 self.is_loaded = True
                 logger.info("Piper TTS model loaded successfully")
             else:
@@ -51,40 +258,83 @@ class PiperTTS:
             logger.error(f"Error loading Piper TTS model: {e}")
             self.is_loaded = False
     
-    def _synthesize_to_file(self, text: str, output_path: str) -> bool:
-        """Synthesize text to WAV file using Piper"""
+    def _load_gpu_voice(self) -> None:
+        """Load the voice in-process with ONNX Runtime's CUDA provider"""
         try:
-            cmd = [
-                "piper",
-                "--model", self.model_path,
-                "--config", self.config_path,
-                "--output_file", output_path
-            ]
-            
-            # Use echo to pipe text to piper
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            stdout, stderr = process.communicate(input=text, timeout=5.0)
-            
-            if process.returncode == 0 and os.path.exists(output_path):
-                return True
-            else:
-                logger.error(f"Piper synthesis failed: {stderr}")
-                return False
-                
-        except subprocess.TimeoutExpired:
-            logger.error("Piper synthesis timeout")
+            self._voice = PiperVoice.load(self.model_path, config_path=self.config_path, use_cuda=True)
+            self.model_sample_rate = self._voice.config.sample_rate
+            logger.info("Piper voice loaded on GPU")
+        except Exception as e:
+            logger.warning(f"GPU Piper voice unavailable, using the Piper process: {e}")
+            self._voice = None
+    
+    def _synthesize_stream(self, text: str, sink) -> bool:
+        """
+        Synthesize one utterance, handing S16_LE PCM chunks to sink as they are ready
+        Returns:
+            True if the whole utterance was synthesized
+        """
+        if self._voice is None:
+            return self._piper.stream(text, sink)
+        
+        try:
+            for audio_bytes in self._voice.synthesize_stream_raw(text, sentence_silence=0.2):
+                sink(memoryview(audio_bytes))
+            return True
+        except Exception as e:
+            logger.error(f"GPU Piper synthesis failed: {e}")
             return False
+    
+    def open_stream(self) -> bool:
+        """Open the callback stream that plays whatever is queued in the ring"""
+        if self.stream is not None:
+            return True
+        
+        try:
+            # A new stream runs its callback on a new thread
+            self._callback_realtime = False
+            self.stream = sd.OutputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype='int16',
+                blocksize=512,
+                callback=self._audio_callback
+            )
+            self.stream.start()
+            return True
         except Exception as e:
-            logger.error(f"Piper synthesis error: {e}")
+            logger.error(f"Failed to open audio output stream: {e}")
+            self.stream = None
             return False
     
+    def _audio_callback(self, outdata: np.ndarray, frames: int, time_info, status) -> None:
+        """PortAudio callback: copy from the ring only, no locks or allocation"""
+        if not self._callback_realtime:
+            # Only the thread draining the ring runs real-time; synthesis stays
+            # at normal priority so it never competes with it on the audio core
+            self._callback_realtime = True
+            self._set_realtime()
+        
+        out = outdata[:, 0]
+        cue_id, cue = self._cue_request
+        if cue_id != self._cue_seen:
+            self._cue_seen = cue_id
+            self._cue = cue
+            self._cue_pos = 0
+        
+        if self._cue is not None:
+            # A cue preempts speech; the ring holds its place and resumes afterwards
+            pos = self._cue_pos
+            count = min(out.size, self._cue.size - pos)
+            np.copyto(out[:count], self._cue[pos:pos + count])
+            out[count:].fill(0)
+            self._cue_pos = pos + count
+            if self._cue_pos >= self._cue.size:
+                self._cue = None
+            return
+        
+        self._ring.read_into(out)
+    
     def speak(self, text: str, blocking: bool = False) -> None:
         """
         Convert text to speech and play it
@@ -92,7 +342,7 @@ class PiperTTS:
             text: Text to synthesize
             blocking: If True, wait for speech to complete
         """
-        if not self.is_loaded:
+        if self._loaded.is_set() and not self.is_loaded:
             logger.warning("TTS model not loaded, skipping speech")
             return
         
@@ -104,17 +354,155 @@ class PiperTTS:
             if not self.is_playing:
                 self._start_playback_thread()
     
+    def _warm_cache(self) -> None:
+        """Load (or synthesize and store) audio for the fixed status prompts"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"TTS cache directory unavailable, caching in memory only: {e}")
+        
+        try:
+            model_mtime = os.stat(self.model_path).st_mtime_ns
+        except OSError:
+            model_mtime = 0
+        
+        for text in list(self.STATUS_MESSAGES.values()) + [self.PASSWORD_PROMPT]:
+            # Keyed on the model too, so a new voice never replays stale audio
+            key = hashlib.sha1(f"{model_mtime}:{self.sample_rate}:{text}".encode("utf-8")).hexdigest()
+            path = os.path.join(self.cache_dir, f"{key}.wav")
+            
+            try:
+                audio = np.fromfile(path, dtype=np.int16, offset=WAV_HEADER.size)
+            except (OSError, ValueError):
+                audio = self._synthesize_pcm(text)
+                if audio is None:
+                    continue
+                self._store_cached(path, audio)
+            
+            self._cache[text] = audio
+        
+        logger.info(f"Cached {len(self._cache)} TTS prompts")
+    
+    def _store_cached(self, path: str, audio: np.ndarray) -> None:
+        """Write cached prompt audio as a 16-bit mono WAV"""
+        tmp_path = f"{path}.tmp"
+        try:
+            write_wav(tmp_path, audio, self.sample_rate)
+            # Rename into place so a crash never leaves a truncated entry
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not store TTS cache entry {path}: {e}")
+    
+    def _synthesize_pcm(self, text: str) -> Optional[np.ndarray]:
+        """Synthesize a whole utterance to int16 at the output rate"""
+        pcm = bytearray()
+        if not self._synthesize_stream(text, pcm.extend):
+            return None
+        
+        audio_int16 = np.frombuffer(pcm, dtype=np.int16)
+        if self.model_sample_rate == self.sample_rate:
+            return audio_int16
+        
+        return self._resample_int16(audio_int16, self.model_sample_rate, self.sample_rate)
+    
+    def _resample_int16(self, audio_int16: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        """Hermite-resample int16 PCM to int16 without a normalized float copy"""
+        if orig_sr == target_sr or len(audio_int16) == 0:
+            return audio_int16
+        
+        g = math.gcd(orig_sr, target_sr)
+        up, down = target_sr // g, orig_sr // g
+        out = np.empty(len(audio_int16) * up // down, dtype=np.int16)
+        
+        if njit is not None:
+            _resample_hermite_s16(np.ascontiguousarray(audio_int16), out, up, down)
+            return out
+        
+        # Interpolate in sample units (the int16 -> float32 step happens in the
+        # padding copy), then round and saturate straight into the int16 output
+        audio_data = self._resample_hermite(audio_int16, orig_sr, target_sr)
+        np.rint(audio_data, out=audio_data)
+        np.clip(audio_data, -32768, 32767, out=audio_data)
+        np.copyto(out, audio_data, casting='unsafe')
+        return out
+    
     def _speak_blocking(self, text: str) -> None:
-        """Synthesize and play text synchronously"""
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            temp_path = temp_file.name
+        """Synthesize and play text synchronously, playing while Piper synthesizes"""
+        # Speech requested during startup waits for the warmup instead of being dropped
+        if not self.wait_until_loaded() or not self.open_stream():
+            return
+        
+        with self._producer_lock:
+            self._play_text(text)
+    
+    def _play_text(self, text: str) -> None:
+        """Queue one utterance into the ring and wait for it to play"""
+        generation = self._ring.generation
         
+        def queue_pcm(pcm) -> None:
+            self._ring.write(np.frombuffer(pcm, dtype=np.int16), generation)
+        
+        try:
+            cached = self._cache.get(text)
+            if cached is not None:
+                # Fixed prompt: skip Piper entirely
+                self._ring.write(cached, generation)
+            else:
+                # One Piper line per sentence: sentence 1 plays from the ring while
+                # sentence 2 is synthesized, and the ring being full (~2 s) holds
+                # Piper back, so stop() never waits on a long paragraph
+                for sentence in _SENTENCE_RE.split(text.strip()):
+                    if self._ring.generation != generation:
+                        return
+                    if self.model_sample_rate == self.sample_rate:
+                        if not self._synthesize_stream(sentence, queue_pcm):
+                            return
+                    else:
+                        # Off-rate voice: collect the sentence, then resample it as a whole
+                        audio_int16 = self._synthesize_pcm(sentence)
+                        if audio_int16 is None:
+                            return
+                        self._ring.write(audio_int16, generation)
+            
+            # Return once the queued speech has actually played
+            self._ring.wait_empty(generation, timeout=self._ring.pending / self.sample_rate + 1.0)
+        except Exception as e:
+            logger.error(f"Error playing speech: {e}")
+    
+    def _batch_texts(self, texts: List[str]) -> List[str]:
+        """
+        Merge consecutive uncached texts into one utterance
+        Cached prompts stay separate so they still skip Piper
+        """
+        batches: List[str] = []
+        pending: List[str] = []
+        for text in texts:
+            text = text.strip()
+            if not text:
+                continue
+            if text in self._cache:
+                if pending:
+                    batches.append(" ".join(pending))
+                    pending = []
+                batches.append(text)
+            else:
+                # Keep a sentence break between items so they are not run together
+                pending.append(text if text[-1] in ".!?" else text + ".")
+        if pending:
+            batches.append(" ".join(pending))
+        return batches
+    
+    def _set_realtime(self) -> None:
+        """Pin the calling thread to the audio core and give it SCHED_FIFO, best effort"""
         try:
-            if self._synthesize_to_file(text, temp_path):
-                self._play_audio_file(temp_path)
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+            cpus = os.sched_getaffinity(0)
+            audio_cpu = self.audio_cpu if self.audio_cpu is not None else max(cpus)
+            if audio_cpu in cpus:
+                os.sched_setaffinity(0, {audio_cpu})
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.audio_priority))
+        except (AttributeError, OSError) as e:
+            # Needs CAP_SYS_NICE (or an rtprio limit) for SCHED_FIFO
+            logger.debug(f"Could not raise audio thread priority: {e}")
     
     def _start_playback_thread(self) -> None:
         """Start background thread for audio playback"""
@@ -124,110 +512,139 @@ class PiperTTS:
         def playback_worker():
             self.is_playing = True
             try:
-                while not self.audio_queue.empty():
-                    text = self.audio_queue.get_nowait()
-                    self._speak_blocking(text)
-                    self.audio_queue.task_done()
-            except queue.Empty:
-                pass
+                while True:
+                    # Take everything queued so far and speak it as few utterances
+                    texts = []
+                    try:
+                        while True:
+                            texts.append(self.audio_queue.get_nowait())
+                    except queue.Empty:
+                        pass
+                    if not texts:
+                        break
+                    
+                    for text in self._batch_texts(texts):
+                        self._speak_blocking(text)
+                    for _ in texts:
+                        self.audio_queue.task_done()
             finally:
                 self.is_playing = False
         
         self.playback_thread = threading.Thread(target=playback_worker, daemon=True)
         self.playback_thread.start()
     
-    def _play_audio_file(self, file_path: str) -> None:
-        """Play WAV file through ALSA"""
-        try:
-            # Read WAV file
-            with wave.open(file_path, 'rb') as wav_file:
-                frames = wav_file.readframes(wav_file.getnframes())
-                sample_rate = wav_file.getframerate()
-                channels = wav_file.getnchannels()
-                sample_width = wav_file.getsampwidth()
-            
-            # Convert to numpy array
-            if sample_width == 2:
-                audio_data = np.frombuffer(frames, dtype=np.int16)
-            elif sample_width == 4:
-                audio_data = np.frombuffer(frames, dtype=np.int32)
-            else:
-                logger.error(f"Unsupported sample width: {sample_width}")
-                return
-            
-            # Convert to float32 and normalize
-            audio_data = audio_data.astype(np.float32) / 32767.0
-            
-            # Resample if necessary
-            if sample_rate != self.sample_rate:
-                audio_data = self._resample_audio(audio_data, sample_rate, self.sample_rate)
-            
-            # Play through ALSA
-            sd.play(audio_data, samplerate=self.sample_rate, channels=channels)
-            sd.wait()  # Wait for playback to complete
-            
-        except Exception as e:
-            logger.error(f"Error playing audio file: {e}")
-    
-    def _resample_audio(self, audio_data: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
-        """Simple resampling using linear interpolation"""
-        if orig_sr == target_sr:
+    def _resample_hermite(self, audio_data: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        """
+        4-point cubic Hermite resampling (Niemitalo) in numpy, used when numba is missing
+        Keeps more of the top octave than linear interpolation at little extra cost
+        Returns:
+            float32 view into a buffer reused across calls
+        """
+        if orig_sr == target_sr or len(audio_data) == 0:
             return audio_data
         
-        ratio = target_sr / orig_sr
-        new_length = int(len(audio_data) * ratio)
+        g = math.gcd(orig_sr, target_sr)
+        up, down = target_sr // g, orig_sr // g
+        n = len(audio_data)
+        new_length = n * up // down
+        
+        if self._resample_out.size < new_length:
+            self._resample_out = np.empty(new_length, dtype=np.float32)
+        out = self._resample_out[:new_length]
+        
+        # Repeat the first and last samples so every output has four neighbours
+        if self._hermite_pad.size < n + 3:
+            self._hermite_pad = np.empty(n + 3, dtype=np.float32)
+        padded = self._hermite_pad[:n + 3]
+        padded[1:n + 1] = audio_data
+        padded[0] = audio_data[0]
+        padded[n + 1:] = audio_data[-1]
+        
+        pos = np.arange(new_length, dtype=np.int64) * down
+        i = pos // up
+        a = (pos - i * up).astype(np.float32)
+        a *= np.float32(1.0 / up)
+        xm1, x0, x1, x2 = padded[i], padded[i + 1], padded[i + 2], padded[i + 3]
         
-        # Linear interpolation
-        old_indices = np.linspace(0, len(audio_data) - 1, new_length)
-        resampled = np.interp(old_indices, np.arange(len(audio_data)), audio_data)
+        c1 = 0.5 * (x1 - xm1)
+        c2 = xm1 - 2.5 * x0 + 2.0 * x1 - 0.5 * x2
+        c3 = 0.5 * (x2 - xm1) + 1.5 * (x0 - x1)
         
-        return resampled.astype(np.float32)
+        # Horner evaluation into the reused output
+        np.multiply(c3, a, out=out)
+        out += c2
+        out *= a
+        out += c1
+        out *= a
+        out += x0
+        
+        return out
+    
+    def _make_beep(self, count: int, duration: float, frequency: float) -> np.ndarray:
+        """Build a beep sequence as output-rate int16, tones separated by 100 ms of silence"""
+        n = int(self.sample_rate * duration)
+        # Synthesize directly in int16 units, in place: the stream takes int16 as-is
+        tone = np.arange(n, dtype=np.float32)
+        tone *= np.float32(2 * np.pi * frequency / self.sample_rate)
+        np.sin(tone, out=tone)
+        tone *= np.float32(0.3 * 32767.0)
+        # Apply fade in/out to avoid clicks
+        fade_samples = int(0.01 * self.sample_rate)  # 10ms fade
+        fade = np.linspace(0, 1, fade_samples, dtype=np.float32)
+        tone[:fade_samples] *= fade
+        tone[-fade_samples:] *= fade[::-1]
+        np.rint(tone, out=tone)
+        
+        gap = int(0.1 * self.sample_rate)
+        sequence = np.zeros(count * n + (count - 1) * gap, dtype=np.int16)
+        for i in range(count):
+            start = i * (n + gap)
+            np.copyto(sequence[start:start + n], tone, casting='unsafe')
+        return sequence
+    
+    def _get_beep(self, count: int, duration: float, frequency: float) -> np.ndarray:
+        """Beep sequence from the cache, built on first use"""
+        key = (count, duration, frequency)
+        beep = self._beep_cache.get(key)
+        if beep is None:
+            beep = self._beep_cache[key] = self._make_beep(count, duration, frequency)
+        return beep
     
     def play_beep(self, count: int = 1, duration: float = 0.2, frequency: float = 800.0) -> None:
         """
-        Generate and play beep sounds for audio feedback
+        Play beep sounds for audio feedback
         Args:
             count: Number of beeps
             duration: Duration of each beep in seconds
             frequency: Frequency of beep in Hz
         """
-        def generate_beep(freq: float, duration: float, sample_rate: int) -> np.ndarray:
-            t = np.linspace(0, duration, int(sample_rate * duration), False)
-            beep = 0.3 * np.sin(2 * np.pi * freq * t)
-            # Apply fade in/out to avoid clicks
-            fade_samples = int(0.01 * sample_rate)  # 10ms fade
-            beep[:fade_samples] *= np.linspace(0, 1, fade_samples)
-            beep[-fade_samples:] *= np.linspace(1, 0, fade_samples)
-            return beep.astype(np.float32)
-        
         try:
-            for i in range(count):
-                beep = generate_beep(frequency, duration, self.sample_rate)
-                sd.play(beep, samplerate=self.sample_rate)
-                sd.wait()
-                
-                # Short pause between beeps
-                if i < count - 1:
-                    time.sleep(0.1)
+            self.play_pcm(self._get_beep(count, duration, frequency), self.sample_rate)
                     
         except Exception as e:
             logger.error(f"Error playing beep: {e}")
     
+    def play_pcm(self, samples: np.ndarray, sample_rate: int) -> bool:
+        """
+        Play a short int16 mono cue through the shared output stream, without waiting
+        It starts on the next callback, ahead of any queued speech, and replaces a cue
+        still playing; speech pauses for its length and then resumes
+        Args:
+            samples: int16 samples, not modified while playing
+            sample_rate: Rate of samples, resampled to the stream rate if different
+        Returns:
+            True if the audio was handed to the stream
+        """
+        if not self.open_stream():
+            return False
+        
+        samples = self._resample_int16(samples, sample_rate, self.sample_rate)
+        self._cue_request = (next(self._cue_ids), samples)
+        return True
+    
     def speak_status(self, status: str) -> None:
         """Speak predefined status messages for elderly users"""
-        status_messages = {
-            'recording_start': "Recording started. Please speak now.",
-            'recording_stop': "Recording stopped.",
-            'saved': "Password saved successfully.",
-            'retrieved': "Password retrieved.",
-            'error': "Sorry, I didn't understand. Please try again.",
-            'confirm': "Please confirm this is correct.",
-            'locked': "Vault is locked. Please enter your passphrase.",
-            'unlocked': "Vault unlocked.",
-            'timeout': "Session timed out. Please try again."
-        }
-        
-        message = status_messages.get(status, status)
+        message = self.STATUS_MESSAGES.get(status, status)
         self.speak(message, blocking=False)
     
     def speak_password(self, password: str, confirm: bool = True) -> None:
@@ -238,7 +655,7 @@ class PiperTTS:
             confirm: Whether to ask for confirmation first
         """
         if confirm:
-            self.speak("I will now speak your password. Is this correct?", blocking=True)
+            self.speak(self.PASSWORD_PROMPT, blocking=True)
             # In a real implementation, you'd wait for user confirmation here
             # For now, we'll add a delay
             time.sleep(2)
@@ -250,7 +667,9 @@ class PiperTTS:
     def stop(self) -> None:
         """Stop all TTS operations"""
         try:
-            sd.stop()
+            # Drop queued speech and cancel the utterance being written
+            self._ring.clear()
+            self._cue_request = (next(self._cue_ids), None)
             self.is_playing = False
             # Clear audio queue
             while not self.audio_queue.empty():
@@ -260,37 +679,54 @@ class PiperTTS:
                     break
         except Exception as e:
             logger.error(f"Error stopping TTS: {e}")
+    
+    def close(self) -> None:
+        """Stop playback and shut down the Piper process"""
+        self.stop()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        self._piper.close()
 
 
 class AudioFeedback:
     """Audio feedback system for user interactions"""
     
+    # (count, duration, frequency) per feedback event
+    BEEPS = {
+        'recording_start': (1, 0.3, 800),
+        'recording_stop': (2, 0.2, 600),
+        'success': (3, 0.15, 1000),
+        'error': (1, 0.5, 400),
+        'confirm': (2, 0.2, 700)
+    }
+    
     def __init__(self, tts: PiperTTS):
         self.tts = tts
     
     def recording_start(self) -> None:
         """Audio feedback for recording start"""
-        self.tts.play_beep(count=1, duration=0.3, frequency=800)
+        self.tts.play_beep(*self.BEEPS['recording_start'])
         self.tts.speak_status('recording_start')
     
     def recording_stop(self) -> None:
         """Audio feedback for recording stop"""
-        self.tts.play_beep(count=2, duration=0.2, frequency=600)
+        self.tts.play_beep(*self.BEEPS['recording_stop'])
         self.tts.speak_status('recording_stop')
     
     def success(self) -> None:
         """Audio feedback for successful operation"""
-        self.tts.play_beep(count=3, duration=0.15, frequency=1000)
+        self.tts.play_beep(*self.BEEPS['success'])
         self.tts.speak_status('saved')
     
     def error(self) -> None:
         """Audio feedback for error"""
-        self.tts.play_beep(count=1, duration=0.5, frequency=400)
+        self.tts.play_beep(*self.BEEPS['error'])
         self.tts.speak_status('error')
     
     def confirm(self) -> None:
         """Audio feedback for confirmation needed"""
-        self.tts.play_beep(count=2, duration=0.2, frequency=700)
+        self.tts.play_beep(*self.BEEPS['confirm'])
         self.tts.speak_status('confirm')
 
 
@@ -300,6 +736,7 @@ class AudioManager:
     def __init__(self):
         self.tts = PiperTTS()
         self.feedback = AudioFeedback(self.tts)
+        self.stream = None
         self.is_initialized = False
         
         # Initialize audio system
@@ -308,10 +745,11 @@ class AudioManager:
     def _setup_audio(self) -> None:
         """Setup ALSA audio system for Jetson"""
         try:
-            # Test audio output
-            test_audio = np.zeros(int(0.1 * self.tts.sample_rate), dtype=np.float32)
-            sd.play(test_audio, samplerate=self.tts.sample_rate)
-            sd.wait()
+            # Open the one output stream shared by beeps and speech; it stays
+            # running (silent when idle) until shutdown
+            if not self.tts.open_stream():
+                raise RuntimeError("audio output stream unavailable")
+            self.stream = self.tts.stream
             
             self.is_initialized = True
             logger.info("Audio system initialized successfully")
@@ -358,5 +796,6 @@ class AudioManager:
     def shutdown(self) -> None:
         """Shutdown audio system"""
         if self.is_initialized:
-            self.tts.stop()
+            self.tts.close()
+            self.stream = None
             logger.info("Audio system shutdown complete")
@@ -5,17 +5,22 @@ Health check endpoint /tts/health
 """
 
 import os
+import mmap
+import struct
 import subprocess
-import tempfile
 import threading
 import time
 import logging
 import json
 from typing import Optional, Dict, Any
 from pathlib import Path
-import queue
 import signal
 import sys
+import numpy as np
+import sounddevice as sd
+
+from .piper_process import PiperProcess
+from .pcm import WAV_HEADER
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +35,6 @@ class PiperTTSServer:
         self.config_path = config_path
         self.port = port
         self.is_running = False
-        self.server_thread = None
-        self.request_queue = queue.Queue()
-        self.response_queue = queue.Queue()
         self.health_status = "stopped"
         self.startup_time = 0
         self.request_count = 0
@@ -44,31 +46,31 @@ class PiperTTSServer:
         
         if not os.path.exists(self.config_path):
             raise FileNotFoundError(f"Piper config not found at {self.config_path}")
+        
+        # Long-running Piper pipe, started by start(); Piper is single-threaded
+        # so callers take turns on it directly
+        self._piper = PiperProcess(model_path, config_path)
+        self._piper_lock = threading.Lock()
     
     def start(self) -> bool:
-        """Start the TTS server"""
+        """Start Piper and run the warmup synthesis"""
         if self.is_running:
             logger.warning("TTS server is already running")
             return True
         
         try:
-            self.is_running = True
             self.health_status = "starting"
             self.startup_time = time.time()
             
-            # Start server thread
-            self.server_thread = threading.Thread(target=self._server_worker, daemon=True)
-            self.server_thread.start()
-            
-            # Wait for startup
-            time.sleep(2)
-            
-            if self.health_status == "healthy":
+            if self._test_piper():
+                self.is_running = True
+                self.health_status = "healthy"
                 logger.info("TTS server started successfully")
                 return True
             else:
-                logger.error("TTS server failed to start")
+                logger.error("TTS server failed health check")
                 self.stop()
+                self.health_status = "unhealthy"
                 return False
                 
         except Exception as e:
@@ -81,273 +83,82 @@ class PiperTTSServer:
         self.is_running = False
         self.health_status = "stopping"
         
-        if self.server_thread:
-            self.server_thread.join(timeout=5.0)
-        
+        self._piper.close()
         self.health_status = "stopped"
         logger.info("TTS server stopped")
     
-    def _server_worker(self):
-        """Main server worker thread"""
-        try:
-            # Test Piper initialization
-            if self._test_piper():
-                self.health_status = "healthy"
-                logger.info("TTS server is healthy and ready")
-            else:
-                self.health_status = "unhealthy"
-                logger.error("TTS server failed health check")
-                return
-            
-            # Main server loop
-            while self.is_running:
-                try:
-                    # Process requests
-                    self._process_requests()
-                    time.sleep(0.1)
-                except Exception as e:
-                    logger.error(f"Error in server worker: {e}")
-                    self.error_count += 1
-                    time.sleep(1)
-                    
-        except Exception as e:
-            logger.error(f"Fatal error in server worker: {e}")
-            self.health_status = "unhealthy"
-        finally:
-            self.is_running = False
-    
     def _test_piper(self) -> bool:
-        """Test Piper initialization"""
+        """Start the persistent Piper process and check it synthesizes"""
         try:
-            # Test with a simple phrase
-            test_text = "Hello"
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
-            
-            cmd = [
-                "piper",
-                "--model", self.model_path,
-                "--config", self.config_path,
-                "--output_file", temp_path
-            ]
+            # Test with a simple phrase; this also loads the model once
+            wav_path = self._piper.synthesize("Hello")
             
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            stdout, stderr = process.communicate(input=test_text, timeout=10.0)
-            
-            if process.returncode == 0 and os.path.exists(temp_path):
-                os.unlink(temp_path)
+            if wav_path:
+                os.unlink(wav_path)
                 return True
             else:
-                logger.error(f"Piper test failed: {stderr}")
+                logger.error("Piper test failed")
                 return False
                 
         except Exception as e:
             logger.error(f"Error testing Piper: {e}")
             return False
     
-    def _process_requests(self):
-        """Process queued requests"""
-        try:
-            # Check for new requests
-            while not self.request_queue.empty():
-                request = self.request_queue.get_nowait()
-                self._handle_request(request)
-        except queue.Empty:
-            pass
-        except Exception as e:
-            logger.error(f"Error processing requests: {e}")
-    
-    def _handle_request(self, request: Dict[str, Any]):
-        """Handle a single request"""
-        try:
-            request_type = request.get("type")
-            
-            if request_type == "synthesize":
-                self._handle_synthesize_request(request)
-            elif request_type == "health":
-                self._handle_health_request(request)
-            else:
-                logger.warning(f"Unknown request type: {request_type}")
-                
-        except Exception as e:
-            logger.error(f"Error handling request: {e}")
-            self.error_count += 1
-    
-    def _handle_synthesize_request(self, request: Dict[str, Any]):
-        """Handle synthesis request"""
-        try:
-            text = request.get("text", "")
-            request_id = request.get("id", "")
-            
-            if not text:
-                self._send_response(request_id, {"error": "No text provided"})
-                return
-            
-            # Synthesize text
-            audio_path = self._synthesize_text(text)
-            
-            if audio_path:
-                self._send_response(request_id, {"success": True, "audio_path": audio_path})
-                self.request_count += 1
-            else:
-                self._send_response(request_id, {"error": "Synthesis failed"})
-                self.error_count += 1
-                
-        except Exception as e:
-            logger.error(f"Error in synthesis request: {e}")
-            self._send_response(request.get("id", ""), {"error": str(e)})
-            self.error_count += 1
-    
-    def _handle_health_request(self, request: Dict[str, Any]):
-        """Handle health check request"""
-        try:
-            request_id = request.get("id", "")
-            
-            health_info = {
-                "status": self.health_status,
-                "uptime": time.time() - self.startup_time if self.startup_time > 0 else 0,
-                "request_count": self.request_count,
-                "error_count": self.error_count,
-                "model_path": self.model_path,
-                "config_path": self.config_path
-            }
-            
-            self._send_response(request_id, {"health": health_info})
-            
-        except Exception as e:
-            logger.error(f"Error in health request: {e}")
-            self._send_response(request.get("id", ""), {"error": str(e)})
-    
     def _synthesize_text(self, text: str) -> Optional[str]:
         """Synthesize text to audio file"""
         try:
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
-            
-            cmd = [
-                "piper",
-                "--model", self.model_path,
-                "--config", self.config_path,
-                "--output_file", temp_path
-            ]
-            
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            stdout, stderr = process.communicate(input=text, timeout=5.0)
-            
-            if process.returncode == 0 and os.path.exists(temp_path):
-                return temp_path
-            else:
-                logger.error(f"Piper synthesis failed: {stderr}")
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                return None
-                
-        except subprocess.TimeoutExpired:
-            logger.error("Piper synthesis timeout")
-            return None
+            return self._piper.synthesize(text)
         except Exception as e:
             logger.error(f"Error synthesizing text: {e}")
             return None
     
-    def _send_response(self, request_id: str, response: Dict[str, Any]):
-        """Send response to client"""
-        try:
-            self.response_queue.put({
-                "id": request_id,
-                "response": response,
-                "timestamp": time.time()
-            })
-        except Exception as e:
-            logger.error(f"Error sending response: {e}")
-    
-    def synthesize(self, text: str, timeout: float = 5.0) -> Optional[str]:
-        """Synthesize text (client interface)"""
+    def synthesize(self, text: str) -> Optional[str]:
+        """Synthesize text (client interface), returns the WAV path"""
         if not self.is_running or self.health_status != "healthy":
             logger.warning("TTS server is not healthy")
             return None
         
-        try:
-            request_id = f"req_{int(time.time() * 1000)}"
-            request = {
-                "type": "synthesize",
-                "text": text,
-                "id": request_id
-            }
-            
-            # Send request
-            self.request_queue.put(request)
-            
-            # Wait for response
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                try:
-                    response = self.response_queue.get_nowait()
-                    if response["id"] == request_id:
-                        if "error" in response["response"]:
-                            logger.error(f"Synthesis error: {response['response']['error']}")
-                            return None
-                        return response["response"].get("audio_path")
-                except queue.Empty:
-                    time.sleep(0.1)
-            
-            logger.error("Synthesis request timeout")
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error in synthesis request: {e}")
+        if not text:
+            logger.error("No text provided")
             return None
+        
+        with self._piper_lock:
+            audio_path = self._synthesize_text(text)
+            if audio_path:
+                self.request_count += 1
+            else:
+                self.error_count += 1
+            return audio_path
     
     def get_health(self) -> Dict[str, Any]:
         """Get server health status"""
         if not self.is_running:
             return {"status": "stopped"}
         
-        try:
-            request_id = f"health_{int(time.time() * 1000)}"
-            request = {
-                "type": "health",
-                "id": request_id
-            }
-            
-            # Send request
-            self.request_queue.put(request)
-            
-            # Wait for response
-            start_time = time.time()
-            while time.time() - start_time < 2.0:
-                try:
-                    response = self.response_queue.get_nowait()
-                    if response["id"] == request_id:
-                        return response["response"].get("health", {"status": "unknown"})
-                except queue.Empty:
-                    time.sleep(0.1)
-            
-            return {"status": "timeout"}
-            
-        except Exception as e:
-            logger.error(f"Error getting health status: {e}")
-            return {"status": "error", "error": str(e)}
+        return {
+            "status": self.health_status,
+            "uptime": time.time() - self.startup_time if self.startup_time > 0 else 0,
+            "request_count": self.request_count,
+            "error_count": self.error_count,
+            "model_path": self.model_path,
+            "config_path": self.config_path
+        }
 
 class PiperTTSClient:
     """Client for Piper TTS server with fallback"""
     
     def __init__(self, server: Optional[PiperTTSServer] = None):
+        """
+        Args:
+            server: Warm Piper server, or None to always use the fallback
+        """
         self.server = server
         self.fallback_enabled = True
+        self.fallback_model_path = "/mnt/nvme/blackbox/models/piper/en_US-lessac-medium.onnx"
+        self.fallback_config_path = "/mnt/nvme/blackbox/models/piper/en_US-lessac-medium.onnx.json"
+        self._fallback_rate: Optional[int] = None
+        self._stream = None
+        self._stream_rate = None
     
     def speak(self, text: str) -> bool:
         """Speak text using server or fallback"""
@@ -363,58 +174,91 @@ class PiperTTSClient:
         
         return False
     
+    def _play_pcm(self, samples: np.ndarray, sample_rate: int) -> bool:
+        """Play int16 mono PCM on the client's output stream, reopened if the rate changes"""
+        if self._stream is None or self._stream_rate != sample_rate:
+            if self._stream is not None:
+                self._stream.close()
+            self._stream = sd.OutputStream(samplerate=sample_rate, channels=1, dtype='int16')
+            self._stream.start()
+            self._stream_rate = sample_rate
+        
+        self._stream.write(samples.reshape(-1, 1))
+        return True
+    
     def _play_audio_file(self, audio_path: str) -> bool:
-        """Play audio file using ALSA"""
+        """Play a server WAV through sounddevice, then remove it"""
         try:
-            # Use aplay to play the audio file
-            result = subprocess.run([
-                "aplay", audio_path
-            ], capture_output=True, timeout=10)
-            
-            # Clean up temporary file
-            if os.path.exists(audio_path):
-                os.unlink(audio_path)
+            # Map the file and play straight out of its pages
+            with open(audio_path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ)
+            audio = None
+            try:
+                # Piper writes canonical 44-byte headers: rate at byte 24, samples after it
+                sample_rate = struct.unpack_from('<I', mm, 24)[0]
+                audio = np.frombuffer(mm, dtype=np.int16, offset=WAV_HEADER.size)
+                played = self._play_pcm(audio, sample_rate)
+            finally:
+                audio = None  # Release the export so the map can close
+                try:
+                    mm.close()
+                except BufferError:
+                    # A traceback still holds a view; the map is released with it,
+                    # and the original error is the one reported
+                    pass
             
-            return result.returncode == 0
+            return played
             
         except Exception as e:
             logger.error(f"Error playing audio file: {e}")
             return False
+        finally:
+            # Clean up the server's per-utterance file
+            if os.path.exists(audio_path):
+                os.unlink(audio_path)
     
     def _fallback_speak(self, text: str) -> bool:
-        """Fallback to one-shot Piper CLI"""
+        """Fallback to one-shot Piper CLI, raw PCM straight to the output stream"""
         try:
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
-            
             cmd = [
                 "piper",
-                "--model", "/mnt/nvme/blackbox/models/piper/en_US-lessac-medium.onnx",
-                "--config", "/mnt/nvme/blackbox/models/piper/en_US-lessac-medium.onnx.json",
-                "--output_file", temp_path
+                "--model", self.fallback_model_path,
+                "--config", self.fallback_config_path,
+                "--output-raw"
             ]
             
             process = subprocess.Popen(
                 cmd,
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stderr=subprocess.PIPE
             )
             
-            stdout, stderr = process.communicate(input=text, timeout=5.0)
+            stdout, stderr = process.communicate(input=text.encode("utf-8"), timeout=5.0)
             
-            if process.returncode == 0 and os.path.exists(temp_path):
-                success = self._play_audio_file(temp_path)
-                return success
+            if process.returncode == 0 and stdout:
+                # S16_LE at the voice's own rate
+                audio = np.frombuffer(stdout, dtype=np.int16, count=len(stdout) // 2)
+                return self._play_pcm(audio, self._fallback_sample_rate())
             else:
-                logger.error(f"Fallback synthesis failed: {stderr}")
+                logger.error(f"Fallback synthesis failed: {stderr.decode('utf-8', 'replace')}")
                 return False
                 
         except Exception as e:
             logger.error(f"Error in fallback synthesis: {e}")
             return False
     
+    def _fallback_sample_rate(self) -> int:
+        """Sample rate of the fallback voice from its Piper config, read once"""
+        if self._fallback_rate is None:
+            try:
+                with open(self.fallback_config_path, 'r') as f:
+                    self._fallback_rate = int(json.load(f)["audio"]["sample_rate"])
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Could not read voice sample rate, assuming 22050 Hz: {e}")
+                self._fallback_rate = 22050
+        return self._fallback_rate
+    
     def get_status(self) -> Dict[str, Any]:
         """Get TTS status"""
         if self.server:
@@ -0,0 +1,103 @@
+"""
+Long-running whisper.cpp server shared by the ASR front ends
+Keeps the model loaded between utterances; callers POST WAVs to /inference
+and fall back to the per-utterance CLI while no server is available
+"""
+
+import os
+import time
+import socket
+import atexit
+import threading
+import subprocess
+import logging
+from typing import Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+class WhisperServer:
+    """Persistent whisper-server on a loopback port, launched at most once"""
+
+    def __init__(self, binary: str, model_path: str,
+                 extra_args: Sequence[str] = (), startup_timeout: float = 15.0):
+        self.binary = binary
+        self.model_path = model_path
+        self.extra_args = list(extra_args)
+        self.startup_timeout = startup_timeout  # Covers the model load
+        self.url: Optional[str] = None
+        self._proc: Optional[subprocess.Popen] = None
+        self._attempted = False
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def start(self) -> Optional[str]:
+        """
+        Launch the server and wait until it accepts connections
+        Returns:
+            Base URL of the server, or None if it is unavailable (not retried)
+        """
+        with self._lock:
+            if self._attempted:
+                return self.url
+            self._attempted = True
+
+            if not os.path.exists(self.binary):
+                logger.info(f"whisper-server not found at {self.binary}, using per-utterance CLI")
+                return None
+
+            # Reserve a free loopback port for the server
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.bind(("127.0.0.1", 0))
+                port = s.getsockname()[1]
+
+            cmd = [
+                self.binary,
+                "-m", self.model_path,
+                "--host", "127.0.0.1",
+                "--port", str(port),
+                *self.extra_args
+            ]
+
+            try:
+                self._proc = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL
+                )
+            except OSError as e:
+                logger.warning(f"whisper-server unavailable, using per-utterance CLI: {e}")
+                return None
+
+            # Wait for the model to load and the port to accept connections
+            deadline = time.monotonic() + self.startup_timeout
+            while time.monotonic() < deadline and self._proc.poll() is None:
+                try:
+                    with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                        self.url = f"http://127.0.0.1:{port}"
+                        logger.info(f"whisper-server listening on port {port}")
+                        return self.url
+                except OSError:
+                    time.sleep(0.1)
+
+            logger.warning("whisper-server did not start, using per-utterance CLI")
+            self._stop()
+            return None
+
+    def _stop(self) -> None:
+        """Terminate the server process"""
+        self.url = None
+        if self._proc is None:
+            return
+
+        self._proc.terminate()
+        try:
+            self._proc.wait(timeout=5.0)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._proc = None
+
+    def close(self) -> None:
+        """Stop the server; later start() calls return None"""
+        with self._lock:
+            self._attempted = True
+            self._stop()
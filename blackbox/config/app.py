@@ -4,59 +4,159 @@ All paths under /mnt/nvme/blackbox/{db,logs,models,media} from app/config.py
 """
 
 import os
+import stat
+import time
 from pathlib import Path
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Tuple
+
+def _dir_size(path) -> int:
+    """Total size of regular files under path, using cached scandir metadata"""
+    total = 0
+    # Explicit stack rather than recursion: no depth limit, no per-level frames
+    stack = [path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                except (PermissionError, FileNotFoundError):
+                    continue
+    return total
 
 class AppConfig:
     """Application configuration and paths"""
     
     def __init__(self):
+        # All paths are plain string joins on the base; Path objects are
+        # made once from the finished strings for the public attributes
+        base = "/mnt/nvme/blackbox"
+        db_dir = base + "/db"
+        logs_dir = base + "/logs"
+        models_dir = base + "/models"
+        config_dir = base + "/config"
+        assets_dir = base + "/assets"
+        catalog_dir = base + "/catalog"
+        whisper_dir = models_dir + "/whisper"
+        piper_dir = models_dir + "/piper"
+        beeps_dir = assets_dir + "/beeps"
+        
+        # Path strings never change after construction; build the read-only
+        # mappings once instead of on every get_*_paths() call
+        log_paths = {
+            "app_log": logs_dir + "/app.log",
+            "asr_log": logs_dir + "/asr.log",
+            "vault_log": logs_dir + "/vault.log",
+            "tts_log": logs_dir + "/tts.log",
+            "ui_log": logs_dir + "/ui.log"
+        }
+        self._paths = MappingProxyType({
+            "base_dir": base,
+            "db_dir": db_dir,
+            "logs_dir": logs_dir,
+            "models_dir": models_dir,
+            "media_dir": base + "/media",
+            "config_dir": config_dir,
+            "assets_dir": assets_dir,
+            "catalog_dir": catalog_dir,
+            "backups_dir": base + "/backups",
+            "vault_db": db_dir + "/vault.db",
+            "backup_dir": db_dir + "/backups",
+            **log_paths,
+            "whisper_dir": whisper_dir,
+            "piper_dir": piper_dir,
+            "llm_dir": models_dir + "/llm",
+            "audio_config": config_dir + "/audio.json",
+            "voice_config": config_dir + "/voice.json",
+            "app_config": config_dir + "/app.yaml",
+            "beeps_dir": beeps_dir,
+            "sites_catalog": catalog_dir + "/sites.json"
+        })
+        self._model_paths = MappingProxyType({
+            "whisper_binary": whisper_dir + "/whisper",
+            "whisper_tiny": whisper_dir + "/whisper-tiny.en.bin",
+            "whisper_base": whisper_dir + "/whisper-base.en.bin",
+            "piper_binary": piper_dir + "/piper",
+            "piper_model": piper_dir + "/en_US-lessac-medium.onnx",
+            "piper_config": piper_dir + "/en_US-lessac-medium.onnx.json"
+        })
+        self._log_paths = MappingProxyType(log_paths)
+        self._beep_paths = MappingProxyType({
+            "recording_start": beeps_dir + "/recording_start.wav",
+            "recording_stop": beeps_dir + "/recording_stop.wav",
+            "success": beeps_dir + "/success.wav",
+            "error": beeps_dir + "/error.wav",
+            "confirm": beeps_dir + "/confirm.wav"
+        })
+        paths = self._paths
+        
         # Base directory
-        self.base_dir = Path("/mnt/nvme/blackbox")
+        self.base_dir = Path(base)
         
         # Subdirectories
-        self.db_dir = self.base_dir / "db"
-        self.logs_dir = self.base_dir / "logs"
-        self.models_dir = self.base_dir / "models"
-        self.media_dir = self.base_dir / "media"
-        self.config_dir = self.base_dir / "config"
-        self.assets_dir = self.base_dir / "assets"
-        self.catalog_dir = self.base_dir / "catalog"
-        self.backups_dir = self.base_dir / "backups"
+        self.db_dir = Path(db_dir)
+        self.logs_dir = Path(logs_dir)
+        self.models_dir = Path(models_dir)
+        self.media_dir = Path(paths["media_dir"])
+        self.config_dir = Path(config_dir)
+        self.assets_dir = Path(assets_dir)
+        self.catalog_dir = Path(catalog_dir)
+        self.backups_dir = Path(paths["backups_dir"])
         
         # Database paths
-        self.vault_db = self.db_dir / "vault.db"
-        self.backup_dir = self.db_dir / "backups"
+        self.vault_db = Path(paths["vault_db"])
+        self.backup_dir = Path(paths["backup_dir"])
         
         # Log paths
-        self.app_log = self.logs_dir / "app.log"
-        self.asr_log = self.logs_dir / "asr.log"
-        self.vault_log = self.logs_dir / "vault.log"
-        self.tts_log = self.logs_dir / "tts.log"
-        self.ui_log = self.logs_dir / "ui.log"
+        self.app_log = Path(log_paths["app_log"])
+        self.asr_log = Path(log_paths["asr_log"])
+        self.vault_log = Path(log_paths["vault_log"])
+        self.tts_log = Path(log_paths["tts_log"])
+        self.ui_log = Path(log_paths["ui_log"])
         
         # Model paths
-        self.whisper_dir = self.models_dir / "whisper"
-        self.piper_dir = self.models_dir / "piper"
-        self.llm_dir = self.models_dir / "llm"
+        self.whisper_dir = Path(whisper_dir)
+        self.piper_dir = Path(piper_dir)
+        self.llm_dir = Path(paths["llm_dir"])
         
         # Audio paths
-        self.audio_config = self.config_dir / "audio.json"
-        self.voice_config = self.config_dir / "voice.json"
-        self.app_config = self.config_dir / "app.yaml"
+        self.audio_config = Path(paths["audio_config"])
+        self.voice_config = Path(paths["voice_config"])
+        self.app_config = Path(paths["app_config"])
         
         # Asset paths
-        self.beeps_dir = self.assets_dir / "beeps"
+        self.beeps_dir = Path(beeps_dir)
         
         # Catalog paths
-        self.sites_catalog = self.catalog_dir / "sites.json"
+        self.sites_catalog = Path(paths["sites_catalog"])
+        
+        # String forms of the paths the health checks probe on every sweep
+        self.base_dir_str = self._paths["base_dir"]
+        self.vault_db_str = self._paths["vault_db"]
+        
+        # Directory sizes for get_disk_usage: path -> (mtime_ns, size, computed_at)
+        self._size_cache: Dict[Path, Tuple[int, int, float]] = {}
+        self.size_cache_max_age = 300.0
         
         # Ensure directories exist
         self._create_directories()
     
     def _create_directories(self):
         """Create all necessary directories"""
+        # Warm boot: the two deepest leaves exist, so the layout was already created
+        if os.path.isdir(self.beeps_dir) and os.path.isdir(self.backup_dir):
+            return
+        
         directories = [
+            self.base_dir,
             self.db_dir,
             self.logs_dir,
             self.models_dir,
@@ -72,68 +172,39 @@ class AppConfig:
             self.beeps_dir
         ]
         
-        for directory in directories:
-            directory.mkdir(parents=True, exist_ok=True)
+        # Parents first, each path once, one mkdir syscall apiece
+        for directory in sorted(set(directories), key=lambda p: len(p.parts)):
+            try:
+                os.mkdir(directory)
+            except FileExistsError:
+                pass
+            except FileNotFoundError:
+                # Missing ancestor outside the tree (e.g. first boot on a fresh mount)
+                os.makedirs(directory, exist_ok=True)
     
-    def get_paths(self) -> Dict[str, str]:
+    def get_paths(self) -> Mapping[str, str]:
         """Get all paths as dictionary"""
-        return {
-            "base_dir": str(self.base_dir),
-            "db_dir": str(self.db_dir),
-            "logs_dir": str(self.logs_dir),
-            "models_dir": str(self.models_dir),
-            "media_dir": str(self.media_dir),
-            "config_dir": str(self.config_dir),
-            "assets_dir": str(self.assets_dir),
-            "catalog_dir": str(self.catalog_dir),
-            "backups_dir": str(self.backups_dir),
-            "vault_db": str(self.vault_db),
-            "backup_dir": str(self.backup_dir),
-            "app_log": str(self.app_log),
-            "asr_log": str(self.asr_log),
-            "vault_log": str(self.vault_log),
-            "tts_log": str(self.tts_log),
-            "ui_log": str(self.ui_log),
-            "whisper_dir": str(self.whisper_dir),
-            "piper_dir": str(self.piper_dir),
-            "llm_dir": str(self.llm_dir),
-            "audio_config": str(self.audio_config),
-            "voice_config": str(self.voice_config),
-            "app_config": str(self.app_config),
-            "beeps_dir": str(self.beeps_dir),
-            "sites_catalog": str(self.sites_catalog)
-        }
+        return self._paths
     
-    def get_model_paths(self) -> Dict[str, str]:
+    def get_model_paths(self) -> Mapping[str, str]:
         """Get model-specific paths"""
-        return {
-            "whisper_binary": str(self.whisper_dir / "whisper"),
-            "whisper_tiny": str(self.whisper_dir / "whisper-tiny.en.bin"),
-            "whisper_base": str(self.whisper_dir / "whisper-base.en.bin"),
-            "piper_binary": str(self.piper_dir / "piper"),
-            "piper_model": str(self.piper_dir / "en_US-lessac-medium.onnx"),
-            "piper_config": str(self.piper_dir / "en_US-lessac-medium.onnx.json")
-        }
+        return self._model_paths
     
-    def get_log_paths(self) -> Dict[str, str]:
+    def get_log_paths(self) -> Mapping[str, str]:
         """Get log file paths"""
-        return {
-            "app_log": str(self.app_log),
-            "asr_log": str(self.asr_log),
-            "vault_log": str(self.vault_log),
-            "tts_log": str(self.tts_log),
-            "ui_log": str(self.ui_log)
-        }
+        return self._log_paths
     
-    def get_beep_paths(self) -> Dict[str, str]:
+    def get_beep_paths(self) -> Mapping[str, str]:
         """Get beep file paths"""
-        return {
-            "recording_start": str(self.beeps_dir / "recording_start.wav"),
-            "recording_stop": str(self.beeps_dir / "recording_stop.wav"),
-            "success": str(self.beeps_dir / "success.wav"),
-            "error": str(self.beeps_dir / "error.wav"),
-            "confirm": str(self.beeps_dir / "confirm.wav")
-        }
+        return self._beep_paths
+    
+    @staticmethod
+    def _stat_is(path: Path, check) -> bool:
+        """Whether path exists and its mode passes check (e.g. stat.S_ISDIR)"""
+        try:
+            return check(os.stat(path).st_mode)
+        except (OSError, ValueError):
+            return False
     
     def validate_paths(self) -> Dict[str, bool]:
         """Validate that all paths exist and are accessible"""
@@ -150,8 +221,9 @@ class AppConfig:
             ("catalog_dir", self.catalog_dir)
         ]
         
+        # One stat per path, checking the type from the mode bits
         for name, path in directories:
-            validation[name] = path.exists() and path.is_dir()
+            validation[name] = self._stat_is(path, stat.S_ISDIR)
         
         # Check critical files
         critical_files = [
@@ -161,27 +233,36 @@ class AppConfig:
         ]
         
         for name, path in critical_files:
-            validation[name] = path.exists() and path.is_file()
+            validation[name] = self._stat_is(path, stat.S_ISREG)
         
         return validation
     
-    def get_disk_usage(self) -> Dict[str, Any]:
-        """Get disk usage information"""
-        import shutil
-        
+    def get_disk_usage(self, fast: bool = False) -> Dict[str, Any]:
+        """
+        Get disk usage information
+        Args:
+            fast: Only report filesystem totals, skipping the per-directory walk
+                  (for status polling; the full walk is for admin/debug views)
+        """
         usage = {}
         
         try:
-            # Get total disk usage
-            total, used, free = shutil.disk_usage(self.base_dir)
+            # Get total disk usage (same arithmetic as shutil.disk_usage)
+            st = os.statvfs(self.base_dir_str)
+            total = st.f_blocks * st.f_frsize
+            used = (st.f_blocks - st.f_bfree) * st.f_frsize
+            free = st.f_bavail * st.f_frsize
             usage["total"] = total
             usage["used"] = used
             usage["free"] = free
             usage["percent_used"] = (used / total) * 100
             
-            # Get directory sizes
-            usage["directories"] = {}
-            for name, path in [
+            if fast:
+                return usage
+            
+            # Get directory sizes; each walk is blocking getdents/stat I/O, so the
+            # directories are scanned in parallel threads
+            directories = [
                 ("db", self.db_dir),
                 ("logs", self.logs_dir),
                 ("models", self.models_dir),
@@ -190,15 +271,37 @@ class AppConfig:
                 ("assets", self.assets_dir),
                 ("catalog", self.catalog_dir),
                 ("backups", self.backups_dir)
-            ]:
-                if path.exists():
-                    try:
-                        dir_size = sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
-                        usage["directories"][name] = dir_size
-                    except Exception:
-                        usage["directories"][name] = 0
+            ]
+            usage["directories"] = {name: 0 for name, _ in directories}
+            
+            # Reuse sizes whose root directory mtime is unchanged; the age limit
+            # catches files that grew in place, which does not touch the mtime
+            now = time.monotonic()
+            to_scan = []
+            for name, path in directories:
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                except OSError:
+                    self._size_cache.pop(path, None)
+                    continue
+                cached = self._size_cache.get(path)
+                if cached and cached[0] == mtime_ns and now - cached[2] < self.size_cache_max_age:
+                    usage["directories"][name] = cached[1]
                 else:
-                    usage["directories"][name] = 0
+                    to_scan.append((name, path, mtime_ns))
+            
+            if to_scan:
+                with ThreadPoolExecutor(max_workers=len(to_scan)) as pool:
+                    futures = {pool.submit(_dir_size, path): (name, path, mtime_ns)
+                               for name, path, mtime_ns in to_scan}
+                    for future in as_completed(futures):
+                        name, path, mtime_ns = futures[future]
+                        try:
+                            size = future.result()
+                        except Exception:
+                            continue
+                        usage["directories"][name] = size
+                        self._size_cache[path] = (mtime_ns, size, now)
             
         except Exception as e:
             usage["error"] = str(e)
@@ -212,19 +315,19 @@ def get_config() -> AppConfig:
     """Get global configuration instance"""
     return config
 
-def get_paths() -> Dict[str, str]:
+def get_paths() -> Mapping[str, str]:
     """Get all paths as dictionary"""
     return config.get_paths()
 
-def get_model_paths() -> Dict[str, str]:
+def get_model_paths() -> Mapping[str, str]:
     """Get model-specific paths"""
     return config.get_model_paths()
 
-def get_log_paths() -> Dict[str, str]:
+def get_log_paths() -> Mapping[str, str]:
     """Get log file paths"""
     return config.get_log_paths()
 
-def get_beep_paths() -> Dict[str, str]:
+def get_beep_paths() -> Mapping[str, str]:
     """Get beep file paths"""
     return config.get_beep_paths()
 
@@ -5,13 +5,42 @@ Add a tiny /health endpoint (or internal check) used at startup before showing U
 
 import os
 import time
+import sqlite3
 import logging
-from typing import Dict, Any, List
-from pathlib import Path
-import subprocess
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, FrozenSet, List, Tuple
+import ctypes
 
 logger = logging.getLogger(__name__)
 
+# Kernel interfaces read in place of aplay/arecord and ip
+_ASOUND_PCM = "/proc/asound/pcm"
+_SYS_NET = "/sys/class/net"
+
+# AppConfig, resolved on first use (constructing it creates directories)
+_config = None
+
+# Seconds a directory listing is reused by check_models
+_LISTING_TTL = 60
+
+# Read-only connection reused by check_database
+_db_conn = None
+
+# NVML handle: None until first use, False when unavailable
+_nvml = None
+
+@dataclass(frozen=True)
+class CheckResult:
+    """Outcome of a single health check"""
+    __slots__ = ("status", "message", "details", "check_time", "critical")
+    status: str
+    message: str
+    details: Dict[str, Any]
+    check_time: float
+    critical: bool
+
 class HealthChecker:
     """Health check system for BLACK BOX components"""
     
@@ -20,22 +49,54 @@ class HealthChecker:
         self.last_check_time = 0
         self.check_interval = 30  # 30 seconds
         self.overall_status = "unknown"
+        self._last_results: Dict[str, Any] = {}
     
-    def register_check(self, name: str, check_func, critical: bool = True):
-        """Register a health check function"""
+    def register_check(self, name: str, check_func, critical: bool = True,
+                       ttl: float = 0.0, neg_ttl: float = 0.0):
+        """
+        Register a health check function
+        Args:
+            name: Check name
+            check_func: Callable returning the check result dict
+            critical: Whether a failure makes the system unhealthy
+            ttl: Seconds a healthy result is reused before re-running the check
+            neg_ttl: Seconds a "missing" result (file not found) is reused before retrying
+        """
         self.checks[name] = {
             "function": check_func,
             "critical": critical,
+            "ttl": ttl,
+            "neg_ttl": neg_ttl,
+            "missing": False,
             "last_result": None,
             "last_check": 0
         }
     
+    @staticmethod
+    def _reusable(check_info: Dict[str, Any], current_time: float) -> bool:
+        """Whether the check's last result is still within its TTL"""
+        last_result = check_info["last_result"]
+        if last_result is None:
+            return False
+        
+        age = current_time - check_info["last_check"]
+        if last_result.status == "healthy":
+            return age < check_info["ttl"]
+        return check_info["missing"] and age < check_info["neg_ttl"]
+    
+    @staticmethod
+    def _timed(check_func) -> Tuple[Dict[str, Any], float]:
+        """Run a check function, returning its result and how long it took"""
+        start_time = time.time()
+        result = check_func()
+        return result, time.time() - start_time
+    
     def run_checks(self, force: bool = False) -> Dict[str, Any]:
-        """Run all health checks"""
+        """Run all health checks (results within check_interval are shared, not rebuilt)"""
         current_time = time.time()
         
         if not force and current_time - self.last_check_time < self.check_interval:
-            return self._get_cached_results()
+            return self._last_results
         
         results = {
             "timestamp": current_time,
@@ -45,73 +106,59 @@ class HealthChecker:
             "warnings": []
         }
         
+        # Checks that are due are independent and mostly wait on I/O; run them together
+        due = [name for name, check_info in self.checks.items()
+               if not self._reusable(check_info, current_time)]
+        futures = {}
+        if due:
+            with ThreadPoolExecutor(max_workers=len(due)) as pool:
+                futures = {name: pool.submit(self._timed, self.checks[name]["function"])
+                           for name in due}
+        
         for name, check_info in self.checks.items():
-            try:
-                start_time = time.time()
-                result = check_info["function"]()
-                check_time = time.time() - start_time
-                
-                check_result = {
-                    "status": "healthy" if result.get("healthy", False) else "unhealthy",
-                    "message": result.get("message", ""),
-                    "details": result.get("details", {}),
-                    "check_time": check_time,
-                    "critical": check_info["critical"]
-                }
-                
-                results["checks"][name] = check_result
-                
-                # Update cached result
-                check_info["last_result"] = check_result
-                check_info["last_check"] = current_time
-                
-                # Check for critical failures
-                if not result.get("healthy", False) and check_info["critical"]:
-                    results["critical_failures"].append(name)
-                    results["overall_status"] = "unhealthy"
-                elif not result.get("healthy", False):
-                    results["warnings"].append(name)
-                
-            except Exception as e:
-                logger.error(f"Health check '{name}' failed with exception: {e}")
-                check_result = {
-                    "status": "error",
-                    "message": f"Check failed: {str(e)}",
-                    "details": {},
-                    "check_time": 0,
-                    "critical": check_info["critical"]
-                }
-                
-                results["checks"][name] = check_result
-                
-                if check_info["critical"]:
-                    results["critical_failures"].append(name)
-                    results["overall_status"] = "unhealthy"
+            future = futures.get(name)
+            if future is None:
+                # Still fresh (or a known-missing file), skip the probe
+                check_result = check_info["last_result"]
+            else:
+                try:
+                    result, check_time = future.result()
+                    
+                    check_result = CheckResult(
+                        status="healthy" if result.get("healthy", False) else "unhealthy",
+                        message=result.get("message", ""),
+                        details=result.get("details", {}),
+                        check_time=check_time,
+                        critical=check_info["critical"]
+                    )
+                    
+                    # Update cached result
+                    check_info["last_result"] = check_result
+                    check_info["last_check"] = current_time
+                    check_info["missing"] = result.get("missing", False)
+                    
+                except Exception as e:
+                    logger.error(f"Health check '{name}' failed with exception: {e}")
+                    check_result = CheckResult(
+                        status="error",
+                        message=f"Check failed: {str(e)}",
+                        details={},
+                        check_time=0,
+                        critical=check_info["critical"]
+                    )
+            
+            results["checks"][name] = check_result
+            
+            # Check for critical failures
+            if check_result.status != "healthy" and check_info["critical"]:
+                results["critical_failures"].append(name)
+                results["overall_status"] = "unhealthy"
+            elif check_result.status == "unhealthy":
+                results["warnings"].append(name)
         
         self.last_check_time = current_time
         self.overall_status = results["overall_status"]
-        
-        return results
-    
-    def _get_cached_results(self) -> Dict[str, Any]:
-        """Get cached health check results"""
-        results = {
-            "timestamp": self.last_check_time,
-            "overall_status": self.overall_status,
-            "checks": {},
-            "critical_failures": [],
-            "warnings": []
-        }
-        
-        for name, check_info in self.checks.items():
-            if check_info["last_result"]:
-                results["checks"][name] = check_info["last_result"]
-                
-                if check_info["last_result"]["status"] == "unhealthy":
-                    if check_info["critical"]:
-                        results["critical_failures"].append(name)
-                    else:
-                        results["warnings"].append(name)
+        self._last_results = results
         
         return results
     
@@ -131,37 +178,67 @@ class HealthChecker:
         else:
             return f"Warnings: {', '.join(results['warnings'])}"
 
+def _get_config():
+    """Application config, imported once and reused by every check"""
+    global _config
+    if _config is None:
+        from ..config.app import get_config
+        _config = get_config()
+    return _config
+
+@functools.lru_cache(maxsize=32)
+def _list_dir(path: str, bucket: int) -> FrozenSet[str]:
+    """
+    Names in a directory, memoized per time bucket
+    Args:
+        path: Directory to list
+        bucket: Current time bucket; a new bucket forces a fresh listing
+    Returns:
+        Entry names, empty if the directory cannot be read
+    """
+    try:
+        with os.scandir(path) as entries:
+            return frozenset(entry.name for entry in entries)
+    except OSError:
+        return frozenset()
+
 # Health check functions
 def check_database() -> Dict[str, Any]:
     """Check database health"""
+    global _db_conn
     try:
-        from ..config.app import get_config
-        config = get_config()
+        config = _get_config()
         
-        if not config.vault_db.exists():
+        if not os.path.exists(config.vault_db_str):
             return {
                 "healthy": False,
                 "message": "Database file not found",
-                "details": {"path": str(config.vault_db)}
+                "details": {"path": config.vault_db_str},
+                "missing": True
             }
         
         # Check if database is accessible
-        import sqlite3
         try:
-            conn = sqlite3.connect(str(config.vault_db))
-            conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            conn.close()
+            if _db_conn is None:
+                # Opened once, read-only; later sweeps only touch the header page
+                _db_conn = sqlite3.connect(f"file:{config.vault_db_str}?mode=ro", uri=True,
+                                           check_same_thread=False)
+            _db_conn.execute("PRAGMA schema_version").fetchone()
             
             return {
                 "healthy": True,
                 "message": "Database accessible",
-                "details": {"path": str(config.vault_db)}
+                "details": {"path": config.vault_db_str}
             }
         except Exception as e:
+            # Reopen on the next check in case the file was replaced
+            if _db_conn is not None:
+                _db_conn.close()
+                _db_conn = None
             return {
                 "healthy": False,
                 "message": f"Database access error: {str(e)}",
-                "details": {"path": str(config.vault_db)}
+                "details": {"path": config.vault_db_str}
             }
             
     except Exception as e:
@@ -174,21 +251,25 @@ def check_database() -> Dict[str, Any]:
 def check_audio_system() -> Dict[str, Any]:
     """Check audio system health"""
     try:
-        # Check if audio devices are available
-        result = subprocess.run(["aplay", "-l"], capture_output=True, text=True, timeout=5)
-        if result.returncode != 0:
+        # ALSA lists every PCM device with its playback/capture capabilities here
+        try:
+            with open(_ASOUND_PCM) as f:
+                pcm = f.read()
+        except FileNotFoundError:
+            pcm = ""
+        
+        if "playback" not in pcm:
             return {
                 "healthy": False,
                 "message": "No audio output devices found",
-                "details": {"error": result.stderr}
+                "details": {"error": f"No playback PCM in {_ASOUND_PCM}"}
             }
         
-        result = subprocess.run(["arecord", "-l"], capture_output=True, text=True, timeout=5)
-        if result.returncode != 0:
+        if "capture" not in pcm:
             return {
                 "healthy": False,
                 "message": "No audio input devices found",
-                "details": {"error": result.stderr}
+                "details": {"error": f"No capture PCM in {_ASOUND_PCM}"}
             }
         
         return {
@@ -207,21 +288,22 @@ def check_audio_system() -> Dict[str, Any]:
 def check_models() -> Dict[str, Any]:
     """Check AI models health"""
     try:
-        from ..config.app import get_config
-        config = get_config()
+        config = _get_config()
         
         model_paths = config.get_model_paths()
-        missing_models = []
         
-        for name, path in model_paths.items():
-            if not Path(path).exists():
-                missing_models.append(name)
+        # The models share a couple of directories; list each one once
+        # instead of stat-ing every file, and reuse listings for a minute
+        bucket = int(time.time() // _LISTING_TTL)
+        missing_models = [name for name, path in model_paths.items()
+                          if os.path.basename(path) not in _list_dir(os.path.dirname(path), bucket)]
         
         if missing_models:
             return {
                 "healthy": False,
                 "message": f"Missing models: {', '.join(missing_models)}",
-                "details": {"missing_models": missing_models}
+                "details": {"missing_models": missing_models},
+                "missing": True
             }
         
         return {
@@ -240,25 +322,26 @@ def check_models() -> Dict[str, Any]:
 def check_storage() -> Dict[str, Any]:
     """Check storage health"""
     try:
-        from ..config.app import get_config
-        config = get_config()
+        config = _get_config()
         
-        # Check disk space
-        import shutil
-        total, used, free = shutil.disk_usage(config.base_dir)
-        free_gb = free / (1024**3)
+        # Check disk space; filesystem totals only, no directory walk
+        usage = config.get_disk_usage(fast=True)
+        if "error" in usage:
+            raise OSError(usage["error"])
+        free_gb = usage["free"] / (1024**3)
+        total_gb = usage["total"] / (1024**3)
         
         if free_gb < 1.0:  # Less than 1GB free
             return {
                 "healthy": False,
                 "message": f"Low disk space: {free_gb:.2f} GB free",
-                "details": {"free_gb": free_gb, "total_gb": total / (1024**3)}
+                "details": {"free_gb": free_gb, "total_gb": total_gb}
             }
         
         return {
             "healthy": True,
             "message": f"Storage healthy: {free_gb:.2f} GB free",
-            "details": {"free_gb": free_gb, "total_gb": total / (1024**3)}
+            "details": {"free_gb": free_gb, "total_gb": total_gb}
         }
         
     except Exception as e:
@@ -268,15 +351,27 @@ def check_storage() -> Dict[str, Any]:
             "details": {}
         }
 
+def _load_nvml():
+    """Load and initialize NVML once; None when there is no NVIDIA driver"""
+    global _nvml
+    if _nvml is None:
+        try:
+            lib = ctypes.CDLL("libnvidia-ml.so.1")
+            _nvml = lib if lib.nvmlInit_v2() == 0 else False
+        except (OSError, AttributeError):
+            _nvml = False
+    return _nvml or None
+
 def check_gpu() -> Dict[str, Any]:
     """Check GPU health (optional)"""
     try:
-        result = subprocess.run(["nvidia-smi"], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
+        nvml = _load_nvml()
+        count = ctypes.c_uint(0)
+        if nvml is not None and nvml.nvmlDeviceGetCount_v2(ctypes.byref(count)) == 0 and count.value:
             return {
                 "healthy": True,
                 "message": "GPU available",
-                "details": {"gpu_available": True}
+                "details": {"gpu_available": True, "gpu_count": count.value}
             }
         else:
             return {
@@ -295,30 +390,46 @@ def check_network() -> Dict[str, Any]:
     """Check network health (should be disabled for offline operation)"""
     try:
         # Check if network interfaces are down (good for offline operation)
-        result = subprocess.run(["ip", "link", "show"], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            # Count active interfaces (excluding loopback)
-            active_interfaces = [line for line in result.stdout.split('\n') 
-                               if 'state UP' in line and 'lo:' not in line]
-            
-            if len(active_interfaces) == 0:
-                return {
-                    "healthy": True,
-                    "message": "Network disabled (offline mode)",
-                    "details": {"offline_mode": True}
-                }
-            else:
-                return {
-                    "healthy": False,
-                    "message": f"Network active: {len(active_interfaces)} interfaces",
-                    "details": {"offline_mode": False, "active_interfaces": len(active_interfaces)}
-                }
-        else:
+        try:
+            interfaces = os.scandir(_SYS_NET)
+        except FileNotFoundError:
             return {
                 "healthy": True,
                 "message": "Network status unknown",
                 "details": {}
             }
+        
+        # Count active interfaces (excluding loopback); operstate is one short
+        # line, read raw without decoding
+        active_interfaces = 0
+        with interfaces:
+            for entry in interfaces:
+                if entry.name == "lo":
+                    continue
+                try:
+                    fd = os.open(entry.path + "/operstate", os.O_RDONLY)
+                except OSError:
+                    continue
+                try:
+                    if os.read(fd, 16).startswith(b"up"):
+                        active_interfaces += 1
+                except OSError:
+                    pass
+                finally:
+                    os.close(fd)
+        
+        if active_interfaces == 0:
+            return {
+                "healthy": True,
+                "message": "Network disabled (offline mode)",
+                "details": {"offline_mode": True}
+            }
+        else:
+            return {
+                "healthy": False,
+                "message": f"Network active: {active_interfaces} interfaces",
+                "details": {"offline_mode": False, "active_interfaces": active_interfaces}
+            }
     except Exception as e:
         return {
             "healthy": False,
@@ -331,19 +442,22 @@ health_checker = HealthChecker()
 
 def initialize_health_checks():
     """Initialize all health checks"""
-    # Register critical checks
-    health_checker.register_check("database", check_database, critical=True)
+    # Register critical checks; file-backed checks reuse results between sweeps
+    health_checker.register_check("database", check_database, critical=True, ttl=60, neg_ttl=30)
     health_checker.register_check("audio_system", check_audio_system, critical=True)
-    health_checker.register_check("models", check_models, critical=True)
-    health_checker.register_check("storage", check_storage, critical=True)
+    health_checker.register_check("models", check_models, critical=True, ttl=300, neg_ttl=60)
+    health_checker.register_check("storage", check_storage, critical=True, ttl=60)
     
     # Register optional checks
-    health_checker.register_check("gpu", check_gpu, critical=False)
+    health_checker.register_check("gpu", check_gpu, critical=False, ttl=300)
     health_checker.register_check("network", check_network, critical=False)
 
 def get_health_status() -> Dict[str, Any]:
-    """Get current health status"""
-    return health_checker.run_checks()
+    """Get current health status as plain dicts (e.g. for JSON)"""
+    results = dict(health_checker.run_checks())
+    results["checks"] = {name: asdict(check_result)
+                         for name, check_result in results["checks"].items()}
+    return results
 
 def is_system_healthy() -> bool:
     """Check if system is healthy"""
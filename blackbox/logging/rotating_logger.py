@@ -4,12 +4,100 @@ File logging with rotation: logs/app.log (weekly, keep 4), plus logs/asr.log and
 """
 
 import os
+import time
+import queue
+import atexit
+import threading
+import functools
 import logging
 import logging.handlers
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+# Files written by the named loggers
+LOG_FILES = ("app.log", "asr.log", "vault.log", "tts.log", "ui.log", "system.log")
+
+# Log file write buffer and how often the listener side flushes it
+_LOG_BUFFER_BYTES = 128 * 1024
+_FLUSH_INTERVAL = 0.2
+
+class _LogFormatter(logging.Formatter):
+    """
+    Equivalent of '%(asctime)s - %(name)s - %(levelname)s - %(message)s' that
+    reuses the timestamp within a second and the ' - name - LEVEL - ' part per
+    logger and level
+    """
+    
+    def __init__(self, datefmt: str = '%Y-%m-%d %H:%M:%S'):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt=datefmt)
+        self._last_time = (None, "")  # (whole second, formatted); swapped as one tuple
+        self._prefixes: Dict[tuple, str] = {}
+    
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        last_time = self._last_time
+        if last_time[0] != second:
+            last_time = (second, time.strftime(datefmt or self.datefmt, self.converter(second)))
+            self._last_time = last_time
+        return last_time[1]
+    
+    def format(self, record):
+        record.message = record.getMessage()
+        key = (record.name, record.levelname)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = self._prefixes.setdefault(key, f" - {record.name} - {record.levelname} - ")
+        
+        text = self.formatTime(record) + prefix + record.message
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            text = text + "\n" + record.exc_text
+        if record.stack_info:
+            text = text + "\n" + self.formatStack(record.stack_info)
+        return text
+
+class _BufferedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """TimedRotatingFileHandler that buffers writes instead of flushing every record"""
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=_LOG_BUFFER_BYTES,
+                    encoding=self.encoding)
+    
+    def emit(self, record):
+        super().emit(record)
+        # Errors go to disk right away in case the process is about to die
+        if record.levelno >= logging.ERROR:
+            self.flush_buffer()
+    
+    def flush(self):
+        """Per-record flush is skipped; flush_buffer runs on a timer.
+        Rollover and close still flush, since closing the stream writes it out"""
+    
+    def flush_buffer(self):
+        """Write buffered records to the file"""
+        self.acquire()
+        try:
+            if self.stream:
+                self.stream.flush()
+        finally:
+            self.release()
+
+@functools.lru_cache(maxsize=1)
+def _query_gpu() -> str:
+    """GPU name and memory from nvidia-smi, queried once per process"""
+    import subprocess
+    
+    try:
+        result = subprocess.run(["nvidia-smi", "--query-gpu=name,memory.total", "--format=csv,noheader,nounits"],
+                                capture_output=True, text=True, timeout=5)
+        if result.returncode == 0:
+            return result.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return "Not available"
+
 class RotatingLogger:
     """Rotating logger with file rotation"""
     
@@ -25,6 +113,16 @@ class RotatingLogger:
         self.when = when
         self.interval = interval
         
+        # Callers only enqueue records; one listener thread does the file I/O
+        self._queue = queue.Queue(maxsize=10000)
+        self._file_handlers: Dict[str, logging.Handler] = {}
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._flush_stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._formatter = _LogFormatter()
+        self._sysinfo_cache: Optional[List[str]] = None
+        self._log_paths = {name: str(self.log_dir / name) for name in LOG_FILES}
+        
         # Create log directory
         self.log_dir.mkdir(parents=True, exist_ok=True)
         
@@ -75,6 +173,20 @@ class RotatingLogger:
             self.log_dir / "system.log",
             level=logging.INFO
         )
+        
+        # Drain the shared queue into the file handlers; each handler's name
+        # filter routes records to the right file
+        self._listener = logging.handlers.QueueListener(
+            self._queue,
+            *self._file_handlers.values(),
+            respect_handler_level=True
+        )
+        self._listener.start()
+        
+        # File handlers buffer; push their contents out every _FLUSH_INTERVAL
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.stop)
     
     def _setup_logger(self, name: str, log_file: Path, level: int = logging.INFO):
         """Setup a single logger with rotation"""
@@ -86,8 +198,8 @@ class RotatingLogger:
         # Clear existing handlers
         logger.handlers.clear()
         
-        # Create rotating file handler
-        file_handler = logging.handlers.TimedRotatingFileHandler(
+        # Create rotating file handler, written from the listener thread
+        file_handler = _BufferedRotatingFileHandler(
             filename=log_file,
             when=self.when,
             interval=self.interval,
@@ -95,16 +207,16 @@ class RotatingLogger:
             encoding='utf-8'
         )
         
-        # Create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
+        # Shared formatter, so its timestamp cache serves every logger
+        formatter = self._formatter
         
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        file_handler.addFilter(logging.Filter(name))
+        self._file_handlers[name] = file_handler
+        logger.addHandler(logging.handlers.QueueHandler(self._queue))
         
-        # Add console handler for critical messages
+        # Add console handler for critical messages; not queued, so errors
+        # still reach the console synchronously
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.ERROR)
         console_handler.setFormatter(formatter)
@@ -113,6 +225,30 @@ class RotatingLogger:
         # Prevent propagation to root logger
         logger.propagate = False
     
+    def _flush_loop(self):
+        """Periodically flush the buffered file handlers"""
+        while not self._flush_stop.wait(_FLUSH_INTERVAL):
+            self._flush_handlers()
+    
+    def _flush_handlers(self):
+        """Flush every file handler's write buffer"""
+        for handler in self._file_handlers.values():
+            try:
+                handler.flush_buffer()
+            except Exception:
+                pass
+    
+    def stop(self):
+        """Flush queued records to the log files and stop the listener thread"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._flusher is not None:
+            self._flush_stop.set()
+            self._flusher.join()
+            self._flusher = None
+        self._flush_handlers()
+    
     def get_logger(self, name: str) -> logging.Logger:
         """Get a logger by name"""
         return logging.getLogger(name)
@@ -145,27 +281,33 @@ class RotatingLogger:
         """Log system information"""
         system_logger = self.get_system_logger()
         
-        # Log system info
-        import platform
-        import psutil
-        
-        system_logger.info("=== System Information ===")
-        system_logger.info(f"Platform: {platform.platform()}")
-        system_logger.info(f"Python: {platform.python_version()}")
-        system_logger.info(f"CPU: {platform.processor()}")
-        system_logger.info(f"Memory: {psutil.virtual_memory().total / (1024**3):.2f} GB")
-        system_logger.info(f"Disk: {psutil.disk_usage('/').total / (1024**3):.2f} GB")
+        # Host facts do not change while running; gather them once
+        if self._sysinfo_cache is None:
+            import platform
+            import psutil
+            
+            self._sysinfo_cache = [
+                "=== System Information ===",
+                f"Platform: {platform.platform()}",
+                f"Python: {platform.python_version()}",
+                f"CPU: {platform.processor()}",
+                f"Memory: {psutil.virtual_memory().total / (1024**3):.2f} GB",
+                f"Disk: {psutil.disk_usage('/').total / (1024**3):.2f} GB"
+            ]
         
-        # Log GPU info if available
-        try:
-            import subprocess
-            result = subprocess.run(["nvidia-smi", "--query-gpu=name,memory.total", "--format=csv,noheader,nounits"], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                system_logger.info(f"GPU: {result.stdout.strip()}")
-        except:
-            system_logger.info("GPU: Not available")
+        for line in self._sysinfo_cache:
+            system_logger.info(line)
         
+        # Log GPU info if available; the first query spawns nvidia-smi, so it
+        # runs off the caller's thread
+        if _query_gpu.cache_info().currsize:
+            self._log_gpu_info(system_logger)
+        else:
+            threading.Thread(target=self._log_gpu_info, args=(system_logger,), daemon=True).start()
+    
+    def _log_gpu_info(self, system_logger: logging.Logger):
+        """Log the GPU line and close the system information block"""
+        system_logger.info(f"GPU: {_query_gpu()}")
         system_logger.info("=== End System Information ===")
     
     def log_startup(self):
@@ -188,37 +330,28 @@ class RotatingLogger:
         """Get log file statistics"""
         stats = {}
         
-        log_files = [
-            "app.log",
-            "asr.log",
-            "vault.log",
-            "tts.log",
-            "ui.log",
-            "system.log"
-        ]
-        
-        for log_file in log_files:
-            log_path = self.log_dir / log_file
-            if log_path.exists():
-                try:
-                    file_size = log_path.stat().st_size
-                    modified_time = datetime.fromtimestamp(log_path.stat().st_mtime)
-                    
-                    stats[log_file] = {
-                        "size_bytes": file_size,
-                        "size_mb": file_size / (1024 * 1024),
-                        "modified": modified_time.isoformat(),
-                        "exists": True
-                    }
-                except Exception as e:
-                    stats[log_file] = {
-                        "error": str(e),
-                        "exists": True
-                    }
-            else:
+        # One stat per file; a missing file raises instead of needing an exists() check
+        for log_file, log_path in self._log_paths.items():
+            try:
+                st = os.stat(log_path)
+            except FileNotFoundError:
                 stats[log_file] = {
                     "exists": False
                 }
+                continue
+            except Exception as e:
+                stats[log_file] = {
+                    "error": str(e),
+                    "exists": True
+                }
+                continue
+            
+            stats[log_file] = {
+                "size_bytes": st.st_size,
+                "size_mb": st.st_size / (1024 * 1024),
+                "modified": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(st.st_mtime)),
+                "exists": True
+            }
         
         return stats
     
@@ -249,12 +382,14 @@ class RotatingLogger:
         app_logger = self.get_app_logger()
         app_logger.info("Manual log rotation requested")
         
-        # Force rotation of all handlers
-        for logger_name in ["app", "asr", "vault", "tts", "ui", "system"]:
-            logger = logging.getLogger(logger_name)
-            for handler in logger.handlers:
-                if isinstance(handler, logging.handlers.TimedRotatingFileHandler):
-                    handler.doRollover()
+        # Force rotation of all handlers; the handler lock keeps the listener
+        # thread from writing mid-rollover
+        for handler in self._file_handlers.values():
+            handler.acquire()
+            try:
+                handler.doRollover()
+            finally:
+                handler.release()
         
         app_logger.info("Log rotation completed")
 
@@ -8,12 +8,26 @@ Feature flag controlled, max_new_tokens=16, temperature=0.0
 import json
 import os
 import logging
+import functools
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 
+try:
+    import yaml
+    # libyaml-backed loader when PyYAML was built with it
+    _YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+except ImportError:
+    yaml = None
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+_JSON_DECODER = json.JSONDecoder()
+
+# Sentinel for absent response fields, and the accepted confidence types
+_MISSING = object()
+_NUMBER_TYPES = (int, float)
+
+@dataclass(frozen=True)
 class LLMConfig:
     """LLM configuration"""
     enabled: bool = False
@@ -23,6 +37,29 @@ class LLMConfig:
     timeout_seconds: int = 5
     confidence_threshold: float = 0.85
 
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(config_path: str, mtime_ns: int) -> LLMConfig:
+    """
+    Parse the llm section of the app YAML
+    Args:
+        config_path: YAML file to read
+        mtime_ns: File modification time; part of the cache key so edits are picked up
+    Returns:
+        Parsed config, shared between callers (LLMConfig is immutable)
+    """
+    with open(config_path, 'r') as f:
+        config_data = yaml.load(f, Loader=_YAML_LOADER)
+    
+    llm_config = config_data.get('llm', {})
+    return LLMConfig(
+        enabled=llm_config.get('enabled', False),
+        model_path=llm_config.get('model_path', "/mnt/nvme/blackbox/models/llm/"),
+        max_new_tokens=llm_config.get('max_new_tokens', 16),
+        temperature=llm_config.get('temperature', 0.0),
+        timeout_seconds=llm_config.get('timeout_seconds', 5),
+        confidence_threshold=llm_config.get('confidence_threshold', 0.85)
+    )
+
 class LLMNormalizer:
     """Tiny LLM normalizer for site name resolution"""
     
@@ -93,16 +130,20 @@ class LLMNormalizer:
     def _parse_response(self, response: str) -> Dict[str, Any]:
         """Parse and validate LLM response"""
         try:
-            # Extract JSON from response
-            import re
-            json_match = re.search(r'\{[^}]*\}', response)
-            if json_match:
-                json_str = json_match.group()
-                result = json.loads(json_str)
+            # Decode the first JSON object in the response; raw_decode handles
+            # nested braces and stops at the end of the object
+            start = response.find("{")
+            while start >= 0:
+                try:
+                    result, _ = _JSON_DECODER.raw_decode(response, start)
+                except ValueError:
+                    start = response.find("{", start + 1)
+                    continue
                 
                 # Validate response schema
                 if self._validate_response_schema(result):
                     return result
+                break
             
         except Exception as e:
             logger.error(f"Error parsing LLM response: {e}")
@@ -110,25 +151,15 @@ class LLMNormalizer:
         return {"site": None, "confidence": 0.0}
     
     def _validate_response_schema(self, result: Dict[str, Any]) -> bool:
-        """Validate response schema"""
-        required_fields = ["site", "confidence"]
-        
-        for field in required_fields:
-            if field not in result:
-                return False
-        
-        # Validate confidence is a float between 0 and 1
-        if not isinstance(result["confidence"], (int, float)):
-            return False
-        
-        if not 0 <= result["confidence"] <= 1:
-            return False
-        
-        # Validate site is string or null
-        if result["site"] is not None and not isinstance(result["site"], str):
-            return False
-        
-        return True
+        """Validate response schema: site is a string or null, confidence a number in [0, 1]"""
+        # Exact type checks: JSON only yields str/int/float/bool here, and
+        # booleans are not valid confidences
+        site = result.get("site", _MISSING)
+        confidence = result.get("confidence", _MISSING)
+        return (site is not _MISSING
+                and (site is None or type(site) is str)
+                and type(confidence) in _NUMBER_TYPES
+                and 0 <= confidence <= 1)
     
     def get_status(self) -> Dict[str, Any]:
         """Get LLM normalizer status"""
@@ -151,20 +182,15 @@ class LLMNormalizerManager:
     def _load_config(self) -> LLMConfig:
         """Load configuration from YAML file"""
         try:
-            import yaml
-            if os.path.exists(self.config_path):
-                with open(self.config_path, 'r') as f:
-                    config_data = yaml.safe_load(f)
-                
-                llm_config = config_data.get('llm', {})
-                return LLMConfig(
-                    enabled=llm_config.get('enabled', False),
-                    model_path=llm_config.get('model_path', "/mnt/nvme/blackbox/models/llm/"),
-                    max_new_tokens=llm_config.get('max_new_tokens', 16),
-                    temperature=llm_config.get('temperature', 0.0),
-                    timeout_seconds=llm_config.get('timeout_seconds', 5),
-                    confidence_threshold=llm_config.get('confidence_threshold', 0.85)
-                )
+            if yaml is None:
+                raise ImportError("PyYAML is not installed")
+            
+            try:
+                mtime_ns = os.stat(self.config_path).st_mtime_ns
+            except FileNotFoundError:
+                return LLMConfig()
+            
+            return _load_config_cached(self.config_path, mtime_ns)
         except Exception as e:
             logger.error(f"Error loading LLM config: {e}")
         
@@ -82,7 +82,8 @@ class AudioFeedback(QObject):
                 wav_file.setnchannels(1)
                 wav_file.setsampwidth(2)
                 wav_file.setframerate(22050)
-                wav_file.writeframes(audio_int16.tobytes())
+                # wave accepts any buffer; skip the tobytes() copy
+                wav_file.writeframes(audio_int16)
             
             logger.info(f"Created beep file: {file_path}")
             
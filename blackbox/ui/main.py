@@ -755,6 +755,9 @@ class MainWindow(QMainWindow):
         if self.audio_manager:
             self.audio_manager.shutdown()
         
+        if self.asr:
+            self.asr.close()
+        
         event.accept()
 
 def main():
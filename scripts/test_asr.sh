@@ -302,6 +302,29 @@ else
     test_warning "Python ASR wrapper not found"
 fi
 
+# Test 8: Transcript parsing test
+echo ""
+echo "8. Testing Transcript Parsing..."
+
+cd "$BLACKBOX_DIR"
+if python3 -c "
+from blackbox.audio.asr import WhisperASR
+
+# Parse without loading a model
+asr = object.__new__(WhisperASR)
+output = b'hello [foo\n[BLANK_AUDIO]\n\nopen the vault [confidence: 0.9]\n'
+result = asr._parse_whisper_output(output)
+assert result == [
+    {'text': 'hello [foo', 'confidence': 0.5},
+    {'text': 'open the vault', 'confidence': 0.9},
+], result
+print('Transcript parsing test completed')
+"; then
+    test_passed "Transcript parsing handles tags and unterminated brackets"
+else
+    test_failed "Transcript parsing test failed"
+fi
+
 # Clean up
 rm -f "$TEST_AUDIO" /tmp/whisper_output.txt
 